@@ -40,11 +40,6 @@ import spacy
 import fr_core_news_md
 import nltk
 import re
-from termcolor import colored
-
-# Modules pour le wordcloud
-from PIL import Image
-from wordcloud import WordCloud, STOPWORDS, ImageColorGenerator
 
 # Module pour scattertext
 import scattertext as st
@@ -52,12 +47,25 @@ import scattertext as st
 # Modules de modélisation
 from sklearn.utils.fixes import loguniform
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, train_test_split
+from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import confusion_matrix, ConfusionMatrixDisplay, classification_report
 
+# Mesure des étapes (temps, mémoire, débit) : activer avec ANALYSE_TWEETS_PROFIL=1 ou =memoire
+from tweets_politiques.instrumentation import etape, ecrire_rapport, PROFILEUR
+
+# Fonctions de preprocessing et modèle (partagés avec les benchmarks)
+from tweets_politiques.preprocessing import (charger_nlp, STOPWORDS_SUPPLEMENTAIRES,
+                                             regexp_link, regexp_number, regexp_hashtags,
+                                             clean_txt_spacy, clean_lemmatize, clean_regexp,
+                                             preprocess_tweet, tokenisation, preparer_tokenisation,
+                                             get_n_most_common_words)
+from tweets_politiques.modele import creer_pipeline, creer_recherche, parametres_recherche
+
+# Indicateurs et graphiques (matplotlib, wordcloud, termcolor sont importés à l'appel des fonctions)
+from tweets_politiques.donnees import check_missing_values, print_famous_tweets
+from tweets_politiques.visualisation import visualize_count_favorites, create_wordcloud
+
 import os
 from google.colab import drive
 drive.mount('drive/')
@@ -77,7 +85,9 @@ Regarder les variables à disposition, quelques comptages, s'il y a des données
 #### Import des données
 """
 
-df_tweets = pd.read_csv('tweets_politics_2022.csv', encoding="utf-8")
+with etape("chargement") as mesure:
+  df_tweets = pd.read_csv('tweets_politics_2022.csv', encoding="utf-8")
+  mesure.nb_lignes = len(df_tweets)
 
 df_tweets.shape
 
@@ -92,10 +102,7 @@ df_tweets.head()
 - Distribution des favoris et des retweets de chaque candidat
 """
 
-def check_missing_values(df):
-  print("check for missing values : ")
-  print(df.isnull().sum()/len(df))  
-  return
+# la fonction check_missing_values est définie dans tweets_politiques/donnees.py
 
 check_missing_values(df_tweets)
 
@@ -118,26 +125,7 @@ df_tweets.groupby("user_id").favorite_count.describe()
 ##### Répartition du nombre de retweets / favoris dans le temps
 """
 
-def visualize_count_favorites(df, userID) : 
-  
-  ''' Cette fonction permet de visualiser le nombre de favoris et de retweets 
-  sur toute la période pour un user_id donné '''
-
-  df_temp = df.loc[df["user_id"] == userID]
-  ylabels = ["favorite_count", "retweet_count"]
-
-  print("Représentation des nombres de retweets et de favoris de chaque tweet de {} par date".format(userID))
-  fig = plt.figure(figsize=(13,3))
-  fig.subplots_adjust(hspace=0.01,wspace=0.01)
-
-  n_row = len(ylabels)
-  n_col = 1
-  for count, ylabel in enumerate(ylabels):
-      ax = fig.add_subplot(n_row, n_col, count + 1)
-      ax.plot(df_temp["created_at"], df_temp[ylabel])
-      ax.set_ylabel(ylabel)
-  
-  plt.show()
+# la fonction visualize_count_favorites est définie dans tweets_politiques/visualisation.py
 
 visualize_count_favorites(df_tweets, "JeanLuc_Melenchon")
 print("\n")
@@ -161,30 +149,16 @@ df_tweets
 
 """##### Lecture de quelques tweets"""
 
-def print_famous_tweets(userID, nb_favorites) :
-
-  ''' Cette fonction permet de sélectionner les tweets qui ont eu le plus de favoris 
-  pour un user_id donné, et de lire le tweet avec les indicateurs des autres variables de la 
-  base de données  
-  '''
-
-  df_sub = df_tweets.loc[(df_tweets.user_id==userID) & (df_tweets.favorite_count > nb_favorites),:]
-  for irow in range(df_sub.shape[0]):
-      df_row = df_sub.iloc[irow,:]
-    
-      print(df_row["created_at"])
-      print("favorite_count={:6} retweet_count={:6}".format(df_row["favorite_count"],df_row["retweet_count"]))
-      print(colored(df_row["text"], 'magenta'))
-      print("\n")
+# la fonction print_famous_tweets est définie dans tweets_politiques/donnees.py
 
 # pour comprendre la fonction du dessus
 df_tweets.shape[0]
 
-print_famous_tweets("Emmanuel_Macron", 90000)
+print_famous_tweets(df_tweets, "Emmanuel_Macron", 90000)
 
-print_famous_tweets("Eric_Zemmour", 20000)
+print_famous_tweets(df_tweets, "Eric_Zemmour", 20000)
 
-print_famous_tweets("Marine_Lepen", 10000)
+print_famous_tweets(df_tweets, "Marine_Lepen", 10000)
 
 """> **Question** : Qu'y-a't'il de particulier dans les tweets par rapport à un texte normal ?
 
@@ -201,18 +175,28 @@ On voit que les tweets ont une syntaxe particulère :
 
 DATE_MIN = "2021-09-01 00:00:00"
 
-df_tweets_temp = df_tweets.loc[df_tweets["created_at"] >= datetime.datetime.strptime(DATE_MIN, "%Y-%m-%d %H:%M:%S")] 
+with etape("filtre_date", nb_lignes=len(df_tweets)):
+  df_tweets_temp = df_tweets.loc[df_tweets["created_at"] >= datetime.datetime.strptime(DATE_MIN, "%Y-%m-%d %H:%M:%S")] 
 
 print(f"Taille du dataframe : {len(df_tweets)}")
 
 candidats_select = ["Eric_Zemmour", "Marine_Lepen", "Emmanuel_Macron", "JeanLuc_Melenchon"]
-                    
-df_tweets_sample = df_tweets_temp.loc[df_tweets_temp.user_id.isin(candidats_select)]
+
+with etape("filtre_candidats", nb_lignes=len(df_tweets_temp)):
+  df_tweets_sample = df_tweets_temp.loc[df_tweets_temp.user_id.isin(candidats_select)]
 
 print(f"Taille du dataframe : {len(df_tweets_sample)}")
 
 df_tweets_sample.groupby('user_id').describe()
 
+"""> Pour traiter tous les candidats sur toute la période, on peut lancer le preprocessing en parallèle 
+> par shards (candidat, mois), avec reprise après un crash grâce aux checkpoints :
+
+```
+python -m tweets_politiques preprocess tweets_politics_2022.csv tweets_preprocess.pkl --tous --processus 8 --checkpoints shards/
+```
+"""
+
 """## **3. Preprocessing du texte**
 
 On va prendre en compte les particularités des tweets pour nettoyer le texte. \
@@ -230,12 +214,10 @@ Pour nettoyer le texte :
 """
 
 # on charge le modèle français de spacy
-nlp = fr_core_news_md.load()
-print(len(nlp.Defaults.stop_words))
-
-# on peut rajouter des stopwords à la liste de spacy de cette manière : 
-nlp.Defaults.stop_words |= {"avoir", "falloir", "faire", "monsieur", "direct",
-                            "interview", "livetweet", "suivez", r"invité\w+", r"(chaîne )?youtube", "mlp"}
+# charger_nlp rajoute des stopwords à la liste de spacy de cette manière : 
+# nlp.Defaults.stop_words |= STOPWORDS_SUPPLEMENTAIRES
+nlp = charger_nlp()
+STOPWORDS_SUPPLEMENTAIRES
                             
 # nombre de stopwords 
 len(nlp.Defaults.stop_words)
@@ -268,9 +250,8 @@ exemple_spacy
 
 """Expressions régulières pour nettoyer le texte """
 
-regexp_link = re.compile(r"http\S+") # suppression des liens
-regexp_number = re.compile(r"\d+[h., ]?\d*") # suppression des chiffres
-regexp_hashtags = re.compile(r"[@#]\S+\s+")   # suppression des hashtags et @
+# regexp_link, regexp_number et regexp_hashtags sont définies dans tweets_politiques/preprocessing.py
+regexp_link, regexp_number, regexp_hashtags
 
 """<details>    
 <summary>
@@ -316,19 +297,7 @@ result = " ".join(result)
 </p>
 """
 
-def clean_txt_spacy(doc):
-  txt = [token.text for token in doc if  (not token.is_stop) and 
-                                         (not token.is_punct) and 
-                                         (not token.is_space)]
-  result = " ".join(txt)
-  return result
-
-def clean_lemmatize(doc):
-  lemmatized_txt = [token.lemma_ for token in doc if  (not token.is_stop) and 
-                                                      (not token.is_punct) and 
-                                                      (not token.is_space)]
-  lemmatized_txt = " ".join(lemmatized_txt)
-  return lemmatized_txt
+# clean_txt_spacy et clean_lemmatize sont définies dans tweets_politiques/preprocessing.py
 
 """<details>    
 <summary>
@@ -339,23 +308,7 @@ def clean_lemmatize(doc):
 </p> 
 """
 
-def preprocess_tweet(text, lemmatizing = True):
-
-  '''Fonction permettant de nettoyer le texte. Elle renvoie un string (pas de tokenisation encore)'''
-  text_clean = text.lower().encode('utf-8').decode('utf-8')
-  
-  # Suppression des liens, hashtags et chiffres avec les regexp précédentes
-  text_clean = re.sub(regexp_link, "", text_clean)
-  text_clean = re.sub(regexp_hashtags, "", text_clean)
-  text_clean = re.sub(regexp_number, "", text_clean)
-
-  doc = nlp(text_clean)  
-  if lemmatizing : 
-    preprocessed_tweet = clean_lemmatize(doc)
-  else : 
-    preprocessed_tweet = clean_txt_spacy(doc)
-
-  return preprocessed_tweet
+# clean_regexp et preprocess_tweet sont définies dans tweets_politiques/preprocessing.py
 
 # exemple pour tester sa fonction 
 tweet_test = "Ils Pensaient se moquer #non, ils m'ont donné 1 slogan !😄 \n\n- Entretien à découvrir et partager \n\nhttps://t.co/Yn60Areagu"
@@ -363,7 +316,13 @@ preprocess_tweet(tweet_test, lemmatizing=True)
 
 # On peut alors nettoyer nos tweets, et créer une nouvelle colonne, text_preprocess
 # cela peut prendre un peu de temps à tourner
-df_tweets_sample["text_preprocess"] = df_tweets_sample["text"].apply(lambda tweet : preprocess_tweet(tweet, lemmatizing=True))
+# Equivalent à preprocess_tweet(tweet, lemmatizing=True), en deux étapes pour mesurer 
+# séparément le nettoyage par regexp et spacy (nlp.pipe traite les tweets par lots)
+with etape("nettoyage", nb_lignes=len(df_tweets_sample)):
+  textes_nettoyes = df_tweets_sample["text"].apply(clean_regexp)
+
+with etape("spacy", nb_lignes=len(df_tweets_sample)):
+  df_tweets_sample["text_preprocess"] = [clean_lemmatize(doc) for doc in nlp.pipe(textes_nettoyes)]
 
 # On regarde le résultat du nettoyage du texte
 pd.set_option("max_colwidth", None)
@@ -378,13 +337,12 @@ On tokenise la colonne de tweets prétraités (preprocess)
 **TODO** : utiliser le module nltk pour tokeniser un tweet avec la fonction tokenisation
 """
 
-nltk.download('punkt') # nécessaire pour la tokenisation
+preparer_tokenisation() # télécharge punkt_tab (nltk >= 3.8.2) si besoin
 
-def tokenisation(tweet):
-  tweet_tokenized = nltk.word_tokenize(tweet)
-  return(tweet_tokenized)
+# la fonction tokenisation est définie dans tweets_politiques/preprocessing.py
 
-df_tweets_sample["tokens"] = df_tweets_sample["text_preprocess"].apply(lambda tweet : tokenisation(tweet))
+with etape("tokenisation", nb_lignes=len(df_tweets_sample)):
+  df_tweets_sample["tokens"] = df_tweets_sample["text_preprocess"].apply(lambda tweet : tokenisation(tweet))
 
 df_tweets_sample[["text_preprocess", "tokens"]].head()
 
@@ -404,11 +362,7 @@ def create_big_tweet_by_userid(userid, col_text) :
   
   return one_big_tweet
 
-def get_n_most_common_words(list_words, n) :
-
-  ''' Fonction permettant de donner les n mots les plus fréquents d'une liste de mots '''
-  freq_words = nltk.FreqDist(list_words)
-  print(freq_words.most_common(n))
+# la fonction get_n_most_common_words est définie dans tweets_politiques/preprocessing.py
 
 """Si on n'utilise pas de preprocessing, quels sont les mots les plus utilisés par les 2 politiciens ?"""
 
@@ -458,6 +412,21 @@ get_n_most_common_words(tokens_candidate2, 10)
 print("Nombre de mots distincts dans les tweets du candidat 1 : {}".format(len(set(tokens_candidate1))))
 print("Nombre de mots distincts dans les tweets du candidat 2 : {}".format(len(set(tokens_candidate2))))
 
+"""Pour le suivi en direct de la campagne, on ne garde pas tous les tokens en mémoire : des esquisses 
+de taille fixe (Space-Saving, Count-Min, HyperLogLog) donnent une approximation des mots les plus 
+fréquents et du nombre de mots distincts. On compare ici l'approximation aux comptes exacts :
+"""
+
+from tweets_politiques.esquisses import comparer_exact
+
+comparaison = comparer_exact(tokens_candidate1, n=10, k=1000)
+print(comparaison["top_approche"])
+print("Erreur max Space-Saving : {} (borne : {:.0f})".format(comparaison["erreur_max_space_saving"], comparaison["borne_space_saving"]))
+print("Erreur max Count-Min : {} (borne : {:.0f})".format(comparaison["erreur_max_count_min"], comparaison["borne_count_min"]))
+print("Mots distincts : {} estimés pour {} (erreur type : {:.1%})".format(comparaison["nb_mots_distincts_estime"],
+                                                                      comparaison["nb_mots_distincts"],
+                                                                      comparaison["erreur_type_hyperloglog"]))
+
 """**Réponse** : 
 
 Jean Luc Mélenchon : 5369 \
@@ -483,14 +452,9 @@ Faire un nuage de mots pour deux candidats de votre choix avec 30 mots
 </p>
 """
 
-# Faire un texte unique pour les tweets de MLP
-def create_wordcloud(text, nb_words):
-  wordcloud = WordCloud(max_words=nb_words, background_color="white").generate(text)
-  plt.figure()
-  plt.imshow(wordcloud, interpolation="bilinear")
-  plt.axis("off")
-  plt.show()
+# la fonction create_wordcloud est définie dans tweets_politiques/visualisation.py
 
+# Faire un texte unique pour les tweets de MLP
 lemat_candidat1 = " ".join(df_tweets_sample.loc[df_tweets_sample.user_id=="Marine_Lepen", "text_preprocess"])
 print("Wordcloud des mots lemmatisés de l'ensemble des tweets de Marine Le Pen")
 create_wordcloud(lemat_candidat1, 30)
@@ -630,7 +594,8 @@ La fonction TfidfVectorizer a des paramètres que vous pouvez choisir :
 """
 
 vectorizer = TfidfVectorizer(max_df=0.9, min_df=5, ngram_range=(1, 2))
-X_train = vectorizer.fit_transform(df_train['text_preprocess'])
+with etape("vectorisation", nb_lignes=len(df_train)):
+  X_train = vectorizer.fit_transform(df_train['text_preprocess'])
 
 """Créer le modèle de régression logistique (OVR) et entrainer le modèle sur les données d'apprentissage"""
 
@@ -638,7 +603,8 @@ X_train = vectorizer.fit_transform(df_train['text_preprocess'])
 model = LogisticRegression(multi_class="ovr", random_state=54269)
 
 # entrainer le modèle avec les données d'apprentissage
-model_default_fit = model.fit(X_train, y_train)
+with etape("entrainement", nb_lignes=len(df_train)):
+  model_default_fit = model.fit(X_train, y_train)
 
 """NB : le random state permet de figer l'aléatoire, et de trouver toujours les mêmes résultats même en faisant tourner le modèle plusieurs fois. """
 
@@ -677,12 +643,10 @@ On veut mettre en place une randomSearch pour sélectionner les meilleurs param
 - on regarde les résultats sur l'échantillon test
 """
 
-# Paramètres à tester données, on peut modifier pour tester d'autres paramètres
-dict_params = dict(prep__text_preprocess__max_df=[0.99, 0.95, 0.9],
-                   prep__text_preprocess__min_df=[2, 5, 10],
-                   clf__C = [1, 20, 50],
-                   clf__penalty = ['l2'],
-                   clf__multi_class=['ovr', 'multinomial'])
+# Paramètres à tester donnés (voir DICT_PARAMS dans tweets_politiques/modele.py), 
+# on peut modifier ce dictionnaire pour tester d'autres paramètres
+dict_params = parametres_recherche()
+dict_params
 
 """Entrainer la Randomsearch avec les paramètres ci-dessus sur les données d'apprentissage avec de la cross validation
 
@@ -691,28 +655,17 @@ NB : une pipeline a été mise en place dans la cellule ci-dessous afin de pouvo
 
 # Entrainer le randomizedsearch 
 
-# Vectorisation de la variable text_preprocess
-text_transformer_tfidf =  TfidfVectorizer()
-preprocess = ColumnTransformer([("text_preprocess", text_transformer_tfidf, "text_preprocess")], 
-                               remainder="drop")
-
-# Type de modèle à tester
-model = LogisticRegression(random_state=54269, max_iter=1000)
-
-# Pipeline qui combine le preprocess et le modèle
-prep_model = Pipeline(steps=[('prep',preprocess),
-                             ('clf', model)])
+# Pipeline qui combine la vectorisation TF-IDF de text_preprocess et la régression logistique
+# (voir creer_pipeline dans tweets_politiques/modele.py)
+creer_pipeline()
 
 # RANDOMIZED SEARCH
-random_search = RandomizedSearchCV( prep_model,
-                                   dict_params,
-                                   cv=5,  # cross validation de 5 échantillons
-                                   n_iter=20,
-                                   random_state=5439676,
-                                   n_jobs=-1,
-                                   verbose=1)
+random_search = creer_recherche(dict_params,
+                                cv=5,  # cross validation de 5 échantillons
+                                n_iter=20)
 
-best_rd_model = random_search.fit(df_train, y_train)
+with etape("recherche", nb_lignes=len(df_train)):
+  best_rd_model = random_search.fit(df_train, y_train)
 
 # Meilleurs paramètres sélectionnés par la randomSearch
 best_rd_model.best_estimator_
@@ -747,7 +700,8 @@ On va calculer la matrice de confusion sur l'échantillon test
 
 #matrice de confusion
 #confrontation entre Y obs. sur l’éch. test et la prédiction
-predictions = best_rd_model.predict(df_test)
+with etape("prediction", nb_lignes=len(df_test)):
+  predictions = best_rd_model.predict(df_test)
 
 cm = confusion_matrix(y_test, 
                       predictions, 
@@ -773,7 +727,18 @@ print(classification_report(y_test, best_rd_model.predict(df_test)))
 
 """On voit que le recall (rappel) sur Emmanuel Macron est très faible (0.45) VS de bons recall pour Jean Luc Mélenchon ou Eric Zemmour.
 
-### Test sur des nouvelles données :
+Ces chiffres sont calculés sur un seul échantillon test : on calcule leurs intervalles de confiance 
+à 95 % par bootstrap (2000 rééchantillonnages des tweets du test, sans réentraîner le modèle), 
+ainsi que l'accuracy par mois.
+"""
+
+from tweets_politiques.evaluation import rapport_bootstrap, accuracy_par_periode
+
+rapport_bootstrap(y_test, predictions, labels=best_rd_model.classes_).round(3)
+
+accuracy_par_periode(df_test["created_at"], y_test, predictions).round(3)
+
+"""### Test sur des nouvelles données :
 
 Ces quelques tweets ont été récupérés après que la base de données ait été récupérée. Ce sont donc des nouvelles données que le modèle n'a jamais vu.
 
@@ -797,4 +762,14 @@ best_rd_model.predict(df_mystere)
 array(['Eric_Zemmour', 'Eric_Zemmour', 'JeanLuc_Melenchon',
        'Emmanuel_Macron', 'JeanLuc_Melenchon'], dtype=object)
 ```
-"""
\ No newline at end of file
+"""
+
+"""### Rapport d'instrumentation
+
+Si l'instrumentation est activée (variable d'environnement ANALYSE_TWEETS_PROFIL), on affiche 
+le temps, la mémoire et le débit de chaque étape et on écrit le rapport JSON de l'exécution.
+"""
+
+if PROFILEUR.actif:
+  print(PROFILEUR.resume())
+  print(f"Rapport écrit dans : {ecrire_rapport()}")
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Mesure du temps de démarrage de la ligne de commande.
+
+Pour chaque commande, lance plusieurs fois `python -m tweets_politiques <commande> --help`
+(démarrage de Python + import de la CLI + lecture des arguments) et garde la médiane, à
+comparer avec le démarrage d'un interpréteur vide. argparse s'arrête avant le corps de la
+commande : ces mesures ne comptent aucun import paresseux.
+
+Les commandes sont donc aussi lancées pour de vrai sur de petits fichiers synthétiques
+préparés hors mesure (1000 tweets, tweets prétraités et petit modèle enregistré) :
+- predict    : prédiction d'un seul tweet, avec le chargement de spacy et de scikit-learn
+- preprocess : preprocessing spacy et tokenisation nltk
+- train      : RandomizedSearch réduite (--n-iter 2 --cv 2 --n-jobs 1)
+- suivi      : fenêtre glissante des mots les plus fréquents
+- stats      : indicateurs pandas
+Une commande qui échoue (par exemple les ressources nltk absentes pour preprocess) est
+notée avec son message d'erreur, sans arrêter les autres mesures.
+
+Avec `python -X importtime`, on vérifie en plus qu'aucun module lourd (spacy, nltk,
+sklearn, matplotlib, wordcloud, scattertext) n'est importé au démarrage, et on liste ceux
+que chaque commande importe réellement.
+
+Les résultats sont enregistrés dans benchmarks/resultats/demarrage_<version>.json.
+
+Exemple :
+    python benchmarks/bench_demarrage.py --repetitions 20 --repetitions-commandes 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from bench_pipeline import DOSSIER_RESULTATS, version_courante
+
+COMMANDES = ["stats", "preprocess", "train", "predict", "suivi", "visualise"]
+MODULES_LOURDS = ["spacy", "fr_core_news_md", "nltk", "sklearn", "matplotlib", "wordcloud", "scattertext", "pandas"]
+
+
+def temps_median(arguments, repetitions):
+
+  ''' Médiane du temps réel (s) pour lancer `python <arguments>` depuis la racine du dépôt '''
+  temps = []
+  for _ in range(repetitions):
+    debut = time.perf_counter()
+    subprocess.run([sys.executable] + arguments, cwd=RACINE, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    temps.append(time.perf_counter() - debut)
+  return statistics.median(temps)
+
+
+def modules_lourds_importes(arguments):
+
+  ''' Modules lourds importés par `python <arguments>`, d'après python -X importtime '''
+  resultat = subprocess.run([sys.executable, "-X", "importtime"] + arguments, cwd=RACINE, check=True,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+  importes = set()
+  for ligne in resultat.stderr.splitlines():
+    module = ligne.rsplit("|", 1)[-1].strip()
+    if module.split(".")[0] in MODULES_LOURDS:
+      importes.add(module.split(".")[0])
+  return sorted(importes)
+
+
+def mesurer(arguments, repetitions):
+
+  ''' Temps médian et modules lourds importés d'une commande ; message d'erreur si elle échoue '''
+  try:
+    return {"temps_s": temps_median(arguments, repetitions),
+            "modules_lourds": modules_lourds_importes(arguments)}
+  except subprocess.CalledProcessError as erreur:
+    lignes = (erreur.stderr or "").strip().splitlines()
+    return {"temps_s": None, "modules_lourds": [], "erreur": lignes[-1] if lignes else f"code {erreur.returncode}"}
+
+
+def preparer_fichiers(dossier, nb_tweets):
+
+  ''' Fichiers d'entrée des commandes, préparés hors mesure : tweets bruts (csv), tweets
+  prétraités (pkl, tokens par simple découpage pour ne pas dépendre de nltk) et modèle
+  entraîné sur ces tweets '''
+  from tweets_politiques.modele import creer_pipeline, sauvegarder_modele
+  from tweets_politiques.preprocessing import preprocess_tweets
+  from tweets_politiques.synthetique import generer_tweets
+
+  df = generer_tweets(nb_tweets)
+  fichiers = {"tweets": os.path.join(dossier, "tweets.csv"),
+              "pretraite": os.path.join(dossier, "pretraite.pkl"),
+              "modele": os.path.join(dossier, "modele.joblib")}
+  df.to_csv(fichiers["tweets"], index=False, encoding="utf-8")
+
+  df["text_preprocess"] = preprocess_tweets(df["text"], lemmatizing=True)
+  df["tokens"] = df["text_preprocess"].str.split()
+  df.to_pickle(fichiers["pretraite"])
+  sauvegarder_modele(creer_pipeline().fit(df, df["user_id"]), fichiers["modele"])
+  return fichiers
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Temps de démarrage de la ligne de commande")
+  parser.add_argument("--repetitions", type=int, default=10, help="lancements de chaque `--help`")
+  parser.add_argument("--repetitions-commandes", type=int, default=3,
+                      help="lancements de chaque commande réelle (plusieurs secondes chacun)")
+  parser.add_argument("--nb-tweets", type=int, default=1000, help="taille des fichiers synthétiques")
+  parser.add_argument("--sortie", default=None, help="défaut : benchmarks/resultats/demarrage_<version>.json")
+  args = parser.parse_args(argv)
+
+  mesures = {"python_vide": {"temps_s": temps_median(["-c", "pass"], args.repetitions), "modules_lourds": []}}
+  for commande in COMMANDES:
+    arguments = ["-m", "tweets_politiques", commande, "--help"]
+    mesures[f"{commande} --help"] = {"temps_s": temps_median(arguments, args.repetitions),
+                                     "modules_lourds": modules_lourds_importes(arguments)}
+
+  with tempfile.TemporaryDirectory() as dossier:
+    fichiers = preparer_fichiers(dossier, args.nb_tweets)
+    commandes = {
+        "predict (1 tweet)": ["predict", fichiers["modele"], "Le pouvoir d'achat des Français doit augmenter"],
+        f"preprocess ({args.nb_tweets} tweets)": ["preprocess", fichiers["tweets"],
+                                                  os.path.join(dossier, "sortie.pkl"), "--tous"],
+        f"train ({args.nb_tweets} tweets)": ["train", fichiers["pretraite"], os.path.join(dossier, "modele_train.joblib"),
+                                             "--tous", "--n-iter", "2", "--cv", "2", "--n-jobs", "1"],
+        f"suivi ({args.nb_tweets} tweets)": ["suivi", fichiers["pretraite"], "--tous"],
+        f"stats ({args.nb_tweets} tweets)": ["stats", fichiers["tweets"]],
+    }
+    for nom, arguments in commandes.items():
+      mesures[nom] = mesurer(["-m", "tweets_politiques"] + arguments, args.repetitions_commandes)
+
+  for nom, mesure in mesures.items():
+    if mesure["temps_s"] is None:
+      print("{:<26} {:>8}     erreur : {}".format(nom, "-", mesure["erreur"]))
+    else:
+      print("{:<26} {:>8.3f} s   {}".format(nom, mesure["temps_s"], ", ".join(mesure["modules_lourds"]) or "-"))
+
+  version = version_courante()
+  sortie = args.sortie or os.path.join(DOSSIER_RESULTATS, f"demarrage_{version}.json")
+  os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+  with open(sortie, "w", encoding="utf-8") as fichier:
+    json.dump({"version": version, "repetitions": args.repetitions,
+               "repetitions_commandes": args.repetitions_commandes, "nb_tweets": args.nb_tweets, "mesures": mesures},
+              fichier, ensure_ascii=False, indent=2)
+  print(f"Résultats écrits dans : {sortie}")
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""Benchmark reproductible du pipeline sur des tweets synthétiques.
+
+Pour chaque taille de jeu de données (10k, 100k, 1M par défaut), on génère des tweets
+synthétiques (tweets_politiques.synthetique) puis on mesure chaque étape :
+- nettoyage        : clean_regexp (liens, hashtags, chiffres)
+- preprocess_tweet : preprocess_tweet appliqué tweet par tweet, comme dans le notebook d'origine
+- preprocess_pipe  : preprocess_tweets (spacy par lots avec nlp.pipe)
+- tokenisation     : tokenisation de text_preprocess
+- frequences       : mots les plus fréquents et nombre de mots distincts par candidat
+- tfidf            : fit du TfidfVectorizer sur l'échantillon train
+- recherche        : RandomizedSearchCV sur la pipeline TF-IDF + régression logistique
+- prediction       : prédiction de l'échantillon test par le meilleur modèle
+- evaluation       : rapport bootstrap (2000 rééchantillonnages) et accuracy par mois sur le test
+
+Les mesures (temps réel, CPU, lignes / s, mémoire) sont faites avec
+tweets_politiques.instrumentation et enregistrées dans benchmarks/resultats/<version>.json,
+où <version> est donnée par `git describe`. L'option --comparer affiche le rapport des
+temps avec un fichier de résultats d'une autre version.
+
+Exemples :
+    python benchmarks/bench_pipeline.py --tailles 10000 100000
+    python benchmarks/bench_pipeline.py --tailles 10000 --comparer benchmarks/resultats/v1.json
+
+NB : les étapes spacy sont de loin les plus longues (plusieurs heures pour 1M de tweets avec
+preprocess_tweet) : utiliser --etapes pour ne mesurer que certaines étapes.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+from tweets_politiques.instrumentation import Profileur
+
+ETAPES = ["nettoyage", "preprocess_tweet", "preprocess_pipe", "tokenisation",
+          "frequences", "tfidf", "recherche", "prediction", "evaluation"]
+# étapes qui ont besoin de text_preprocess (calculé par preprocess_pipe s'il n'est pas déjà là)
+ETAPES_PRETRAITEES = {"tokenisation", "frequences", "tfidf", "recherche", "prediction", "evaluation"}
+ETAPES_MODELE = {"tfidf", "recherche", "prediction", "evaluation"}
+TAILLES = [10000, 100000, 1000000]
+DOSSIER_RESULTATS = os.path.join(RACINE, "benchmarks", "resultats")
+
+
+def version_courante():
+
+  ''' Version du code mesuré (git describe), pour comparer les résultats entre versions '''
+  try:
+    return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=RACINE, check=True,
+                          capture_output=True, text=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return "inconnue"
+
+
+def mesurer_taille(taille, etapes, seed, mode, n_iter, cv):
+
+  ''' Génère `taille` tweets et mesure les étapes demandées. Renvoie la liste des mesures '''
+  from sklearn.feature_extraction.text import TfidfVectorizer
+  from sklearn.model_selection import train_test_split
+
+  from tweets_politiques.evaluation import accuracy_par_periode, rapport_bootstrap
+  from tweets_politiques.modele import creer_recherche
+  from tweets_politiques.preprocessing import (charger_nlp, clean_regexp, most_common_words, preparer_tokenisation,
+                                               preprocess_tweet, preprocess_tweets, tokenisation)
+  from tweets_politiques.synthetique import generer_tweets
+
+  etapes = set(etapes)
+  besoin_preprocess = "preprocess_pipe" in etapes or bool(etapes & ETAPES_PRETRAITEES)
+  if "tokenisation" in etapes or "frequences" in etapes:
+    preparer_tokenisation()  # échoue avant les étapes spacy si les ressources nltk manquent
+  if besoin_preprocess or "preprocess_tweet" in etapes:
+    charger_nlp()  # chargement du modèle spacy hors mesure
+  profileur = Profileur(mode)
+
+  with profileur.etape("generation", nb_lignes=taille):
+    df = generer_tweets(taille, seed=seed)
+
+  if "nettoyage" in etapes:
+    with profileur.etape("nettoyage", nb_lignes=taille):
+      df["text"].apply(clean_regexp)
+
+  if "preprocess_tweet" in etapes:
+    with profileur.etape("preprocess_tweet", nb_lignes=taille):
+      df["text_preprocess"] = df["text"].apply(lambda tweet : preprocess_tweet(tweet, lemmatizing=True))
+
+  if "preprocess_pipe" in etapes or (besoin_preprocess and "text_preprocess" not in df):
+    with profileur.etape("preprocess_pipe", nb_lignes=taille):
+      df["text_preprocess"] = preprocess_tweets(df["text"], lemmatizing=True)
+
+  if "tokenisation" in etapes:
+    with profileur.etape("tokenisation", nb_lignes=taille):
+      df["tokens"] = df["text_preprocess"].apply(tokenisation)
+
+  if "frequences" in etapes:
+    with profileur.etape("frequences", nb_lignes=taille):
+      for _, textes in df.groupby("user_id")["text_preprocess"]:
+        tokens = tokenisation(" ".join(textes))
+        most_common_words(tokens, 10)
+        len(set(tokens))
+
+  if etapes & ETAPES_MODELE:
+    df_train, df_test, y_train, y_test = train_test_split(df, df["user_id"], test_size=0.3, random_state=123)
+
+  if "tfidf" in etapes:
+    with profileur.etape("tfidf", nb_lignes=len(df_train)):
+      TfidfVectorizer(max_df=0.9, min_df=5, ngram_range=(1, 2)).fit_transform(df_train["text_preprocess"])
+
+  if "recherche" in etapes or "prediction" in etapes or "evaluation" in etapes:
+    with profileur.etape("recherche", nb_lignes=len(df_train)):
+      best_rd_model = creer_recherche(n_iter=n_iter, cv=cv, verbose=0).fit(df_train, y_train)
+
+  if "prediction" in etapes or "evaluation" in etapes:
+    with profileur.etape("prediction", nb_lignes=len(df_test)):
+      predictions = best_rd_model.predict(df_test)
+
+  if "evaluation" in etapes:
+    with profileur.etape("evaluation", nb_lignes=len(df_test)):
+      rapport_bootstrap(y_test, predictions, labels=best_rd_model.classes_)
+      accuracy_par_periode(df_test["created_at"], y_test, predictions)
+
+  return [mesure.en_dict() for mesure in profileur.mesures]
+
+
+def comparer(resultats, chemin_reference):
+
+  ''' Affiche, pour chaque taille et étape, le temps de la version de référence et le rapport des temps '''
+  with open(chemin_reference, encoding="utf-8") as fichier:
+    reference = json.load(fichier)
+
+  print("Comparaison avec {} ({})".format(reference["version"], chemin_reference))
+  print("{:>9} {:<18} {:>12} {:>12} {:>8}".format("taille", "etape", "ref (s)", "actuel (s)", "ratio"))
+  for taille, mesures in resultats["resultats"].items():
+    mesures_reference = {m["etape"]: m for m in reference["resultats"].get(taille, [])}
+    for mesure in mesures:
+      if mesure["etape"] not in mesures_reference:
+        continue
+      temps_reference = mesures_reference[mesure["etape"]]["temps_reel_s"]
+      print("{:>9} {:<18} {:>12.2f} {:>12.2f} {:>8.2f}".format(
+          taille, mesure["etape"], temps_reference, mesure["temps_reel_s"],
+          mesure["temps_reel_s"] / temps_reference if temps_reference else float("nan")))
+
+
+def main(argv=None):
+  parser = argparse.ArgumentParser(description="Benchmark du pipeline sur des tweets synthétiques")
+  parser.add_argument("--tailles", type=int, nargs="+", default=TAILLES)
+  parser.add_argument("--etapes", nargs="+", choices=ETAPES, default=ETAPES)
+  parser.add_argument("--seed", type=int, default=0)
+  parser.add_argument("--memoire", action="store_true", help="mesure le pic de mémoire par étape (plus lent)")
+  parser.add_argument("--n-iter", type=int, default=20, help="n_iter de la RandomizedSearch")
+  parser.add_argument("--cv", type=int, default=5, help="nombre de folds de la RandomizedSearch")
+  parser.add_argument("--version", default=None, help="nom de la version mesurée (défaut : git describe)")
+  parser.add_argument("--sortie", default=None, help="fichier de résultats (défaut : benchmarks/resultats/<version>.json)")
+  parser.add_argument("--comparer", default=None, help="fichier de résultats d'une autre version")
+  args = parser.parse_args(argv)
+
+  version = args.version or version_courante()
+  resultats = {"version": version,
+               "date": datetime.datetime.now().isoformat(timespec="seconds"),
+               "python": platform.python_version(),
+               "plateforme": platform.platform(),
+               "nb_processeurs": os.cpu_count(),
+               "seed": args.seed,
+               "n_iter": args.n_iter,
+               "cv": args.cv,
+               "resultats": {}}
+
+  sortie = args.sortie or os.path.join(DOSSIER_RESULTATS, f"{version}.json")
+  os.makedirs(os.path.dirname(os.path.abspath(sortie)), exist_ok=True)
+
+  mode = "memoire" if args.memoire else "temps"
+  for taille in args.tailles:
+    print(f"Taille {taille} ...")
+    resultats["resultats"][str(taille)] = mesurer_taille(taille, args.etapes, args.seed, mode, args.n_iter, args.cv)
+    for mesure in resultats["resultats"][str(taille)]:
+      print("  {:<18} {:>10.2f} s".format(mesure["etape"], mesure["temps_reel_s"]))
+    # écrit après chaque taille : les mesures déjà faites sont gardées si une taille plus grande échoue
+    with open(sortie, "w", encoding="utf-8") as fichier:
+      json.dump(resultats, fichier, ensure_ascii=False, indent=2)
+  print(f"Résultats écrits dans : {sortie}")
+
+  if args.comparer:
+    comparer(resultats, args.comparer)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""Lecture des arguments et commandes de tweets_politiques.cli."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tweets_politiques.cli import creer_parser, main
+from tweets_politiques.donnees import DATE_MIN, candidats_select
+from tweets_politiques.synthetique import generer_tweets
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_preprocess_filtre_par_defaut():
+  args = creer_parser().parse_args(["preprocess", "tweets.csv", "tweets.pkl"])
+  assert args.date_min == DATE_MIN
+  assert args.candidats == candidats_select
+  assert args.lemmatisation
+
+
+def test_stats_sans_filtre_par_defaut():
+  args = creer_parser().parse_args(["stats", "tweets.csv"])
+  assert args.date_min is None and args.candidats is None
+
+
+def test_date_min():
+  parser = creer_parser()
+  assert parser.parse_args(["stats", "tweets.csv", "--date-min", "2022-01-01"]).date_min == "2022-01-01 00:00:00"
+  assert parser.parse_args(["stats", "tweets.csv", "--date-min", "2022-01-01 08:30:00"]).date_min == "2022-01-01 08:30:00"
+  with pytest.raises(SystemExit):
+    parser.parse_args(["stats", "tweets.csv", "--date-min", "01/01/2022"])
+
+
+def test_tous_supprime_les_filtres(monkeypatch):
+  recus = []
+  monkeypatch.setattr("tweets_politiques.cli.commande_preprocess", recus.append)
+  main(["preprocess", "tweets.csv", "tweets.pkl", "--tous", "--date-min", "2022-01-01"])
+  (args,) = recus
+  assert args.date_min is None and args.candidats is None
+
+
+def test_stats(tmp_path, capsys):
+  fichier = tmp_path / "tweets.csv"
+  df = generer_tweets(300)
+  df.to_csv(fichier, index=False, encoding="utf-8")
+
+  main(["stats", str(fichier), "--date-min", "2021-09-01"])
+  sortie = capsys.readouterr().out
+  assert "Taille du dataframe : 300" in sortie
+  assert f"Taille du dataframe après filtres : {(df['created_at'] >= DATE_MIN).sum()}" in sortie
+
+
+@pytest.mark.parametrize("commande", ["stats", "preprocess", "train", "predict", "suivi", "visualise"])
+def test_aide_sans_module_lourd(commande):
+  code = ("import sys\n"
+          "from tweets_politiques.cli import main\n"
+          "try:\n"
+          f"  main([{commande!r}, '--help'])\n"
+          "except SystemExit:\n"
+          "  pass\n"
+          "print('modules lourds :', sorted(m for m in ('pandas', 'sklearn', 'spacy', 'nltk') if m in sys.modules))\n")
+  resultat = subprocess.run([sys.executable, "-c", code], cwd=RACINE, check=True, capture_output=True, text=True)
+  assert resultat.stdout.strip().splitlines()[-1] == "modules lourds : []"
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""Bornes d'erreur et fusion des esquisses de tweets_politiques.esquisses."""
+
+import datetime
+import random
+from collections import Counter
+
+import pytest
+
+from tweets_politiques.esquisses import CountMin, EsquisseMots, HyperLogLog, SpaceSaving, SuiviCandidats
+
+JOUR = datetime.timedelta(days=1)
+DEBUT = datetime.datetime(2022, 3, 1, 12, tzinfo=datetime.timezone.utc)
+
+
+def flux_zipf(nb_mots, nb_distincts = 2000, seed = 0):
+  rng = random.Random(seed)
+  vocabulaire = [f"mot{i}" for i in range(nb_distincts)]
+  poids = [1 / (rang + 1) for rang in range(nb_distincts)]
+  return rng.choices(vocabulaire, weights=poids, k=nb_mots)
+
+
+def verifier_space_saving(resume, exact):
+  borne = resume.n / resume.k
+  for mot, compte in resume.compteurs.items():
+    assert compte - resume.erreurs[mot] <= exact[mot] <= compte
+    assert compte - exact[mot] <= borne
+  # tout mot de fréquence > N / k est suivi
+  assert {mot for mot, compte in exact.items() if compte > borne} <= set(resume.compteurs)
+
+
+def test_space_saving_intervalles():
+  mots = flux_zipf(20000)
+  resume = SpaceSaving(k=50)
+  resume.ajouter(mots)
+  assert resume.n == len(mots)
+  assert len(resume.compteurs) == 50
+  verifier_space_saving(resume, Counter(mots))
+
+
+def test_space_saving_fusion_garde_les_bornes():
+  mots = flux_zipf(20000)
+  gauche, droite = SpaceSaving(k=50), SpaceSaving(k=50)
+  gauche.ajouter(mots[:7000])
+  droite.ajouter(mots[7000:])
+  fusion = gauche.fusionner(droite)
+  assert fusion.n == len(mots)
+  verifier_space_saving(fusion, Counter(mots))
+
+  # les mots les plus fréquents, bien séparés, sont les mêmes que sur le flux complet
+  complet = SpaceSaving(k=50)
+  complet.ajouter(mots)
+  assert [mot for mot, _, _ in fusion.top(3)] == [mot for mot, _, _ in complet.top(3)]
+
+
+def test_space_saving_fusion_k_differents():
+  petit, grand = SpaceSaving(k=2), SpaceSaving(k=10)
+  petit.ajouter(["x"] * 5 + ["a", "b"] * 6)
+  grand.ajouter(["c"])
+  with pytest.raises(ValueError):
+    petit.fusionner(grand)
+
+
+def test_count_min_majorant_et_borne():
+  mots = flux_zipf(20000)
+  exact = Counter(mots)
+  esquisse = CountMin(largeur=272, profondeur=5)
+  esquisse.ajouter(mots)
+  borne = 2.718281828 / esquisse.largeur * len(mots)
+  erreurs = [esquisse.estimation(mot) - compte for mot, compte in exact.items()]
+  assert min(erreurs) >= 0
+  # la borne tient avec une probabilité >= 1 - exp(-5) par mot
+  assert sum(erreur > borne for erreur in erreurs) <= 0.02 * len(erreurs)
+
+
+def test_count_min_et_hyperloglog_fusion_egale_flux_complet():
+  mots = flux_zipf(10000)
+  gauche, droite, complet = EsquisseMots(k=50), EsquisseMots(k=50), EsquisseMots(k=50)
+  gauche.ajouter(mots[:4000])
+  droite.ajouter(mots[4000:])
+  complet.ajouter(mots)
+  fusion = gauche.fusionner(droite)
+  assert fusion.count_min.table == complet.count_min.table
+  assert fusion.hyperloglog.registres == complet.hyperloglog.registres
+  assert fusion.nb_tweets == 2
+
+
+def test_hyperloglog_erreur_relative():
+  esquisse = HyperLogLog(p=12)
+  esquisse.ajouter(f"mot{i}" for i in range(50000))
+  assert abs(esquisse.estimation() - 50000) / 50000 <= 4 * esquisse.erreur_type()
+
+
+def test_fusion_parametres_differents():
+  with pytest.raises(ValueError):
+    CountMin(100, 5).fusionner(CountMin(200, 5))
+  with pytest.raises(ValueError):
+    HyperLogLog(10).fusionner(HyperLogLog(12))
+  with pytest.raises(ValueError):
+    SuiviCandidats(fenetre=3 * JOUR).fusionner(SuiviCandidats(fenetre=4 * JOUR))
+
+
+def test_suivi_expiration_fenetre():
+  suivi = SuiviCandidats(fenetre=3 * JOUR, pas=JOUR, k=20)
+  assert suivi.ajouter("M", DEBUT, ["ancien"] * 4)
+  assert suivi.ajouter("M", DEBUT + JOUR, ["recent"] * 2)
+  assert [mot for mot, _, _ in suivi.top_mots("M")] == ["ancien", "recent"]
+
+  # la tranche de DEBUT sort de la fenêtre
+  assert suivi.ajouter("M", DEBUT + 3 * JOUR, ["nouveau"])
+  assert dict((mot, compte) for mot, compte, _ in suivi.top_mots("M")) == {"recent": 2, "nouveau": 1}
+  assert len(suivi.tranches["M"]) == 2
+
+  # un tweet en retard est accepté tant que sa tranche est dans la fenêtre
+  assert suivi.ajouter("M", DEBUT + JOUR + datetime.timedelta(hours=2), ["recent"])
+  assert not suivi.ajouter("M", DEBUT, ["ancien"])
+  assert suivi.top_mots("M")[0][:2] == ("recent", 3)
+
+
+def test_suivi_fusion_egale_flux_complet():
+  rng = random.Random(1)
+  tweets = [(rng.choice(["M", "Z"]), DEBUT + datetime.timedelta(hours=rng.randrange(24 * 6)), flux_zipf(8, seed=i))
+            for i in range(600)]
+  tweets.sort(key=lambda tweet: tweet[1])
+  gauche, droite, complet = (SuiviCandidats(fenetre=4 * JOUR, pas=JOUR, k=200) for _ in range(3))
+  for i, (user_id, date, mots) in enumerate(tweets):
+    (gauche if i % 2 else droite).ajouter(user_id, date, mots)
+    complet.ajouter(user_id, date, mots)
+
+  fusion = gauche.fusionner(droite)
+  for user_id in ("M", "Z"):
+    assert fusion.esquisse(user_id).nb_tweets == complet.esquisse(user_id).nb_tweets
+    assert fusion.esquisse(user_id).count_min.table == complet.esquisse(user_id).count_min.table
+    assert fusion.nb_mots_distincts(user_id) == complet.nb_mots_distincts(user_id)
+
+
+def test_suivi_fusion_ne_partage_pas_les_esquisses():
+  a = SuiviCandidats(k=20)
+  b = SuiviCandidats(k=20)
+  a.ajouter("M", DEBUT, ["x"])
+  b.ajouter("Z", DEBUT, ["y"])
+
+  fusion = a.fusionner(b)
+  fusion.ajouter("M", DEBUT, ["x"] * 10)
+  fusion.ajouter("Z", DEBUT, ["y"] * 10)
+  assert a.top_mots("M")[0][:2] == ("x", 1)
+  assert b.top_mots("Z")[0][:2] == ("y", 1)
+
+  a.ajouter("M", DEBUT, ["x"] * 5)
+  assert fusion.top_mots("M")[0][:2] == ("x", 11)
+
+
+def test_suivi_fenetre_multiple_du_pas():
+  with pytest.raises(ValueError):
+    SuiviCandidats(fenetre=JOUR, pas=2 * JOUR)
+  with pytest.raises(ValueError):
+    SuiviCandidats(fenetre=7 * JOUR, pas=datetime.timedelta(hours=5))
+  SuiviCandidats(fenetre=7 * JOUR, pas=datetime.timedelta(hours=6))
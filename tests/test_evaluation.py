@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""Matrice de confusion, métriques et bootstrap de tweets_politiques.evaluation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import confusion_matrix, precision_recall_fscore_support
+
+from tweets_politiques.evaluation import (accuracy_par_periode, bootstrap_confusion, matrice_confusion,
+                                          metriques, rapport_bootstrap)
+
+CANDIDATS = np.array(["EmmanuelMacron", "JLMelenchon", "MLP_officiel", "ZemmourEric", "vpecresse"])
+
+
+def predictions(n = 5000, seed = 0):
+  rng = np.random.default_rng(seed)
+  y_true = CANDIDATS[rng.integers(0, len(CANDIDATS), size=n)]
+  # 60 % de bonnes prédictions, les autres au hasard ; une classe jamais prédite
+  y_pred = np.where(rng.random(n) < 0.6, y_true, CANDIDATS[rng.integers(0, len(CANDIDATS) - 1, size=n)])
+  return y_true, y_pred
+
+
+def test_matrice_confusion_comme_sklearn():
+  y_true, y_pred = predictions()
+  cm, labels = matrice_confusion(y_true, y_pred)
+  assert list(labels) == sorted(CANDIDATS)
+  np.testing.assert_array_equal(cm, confusion_matrix(y_true, y_pred, labels=labels))
+
+  # ordre imposé par labels
+  ordre = CANDIDATS[::-1]
+  cm, labels = matrice_confusion(y_true, y_pred, labels=ordre)
+  np.testing.assert_array_equal(cm, confusion_matrix(y_true, y_pred, labels=ordre))
+
+
+def test_metriques_comme_sklearn():
+  y_true, y_pred = predictions()
+  cm, labels = matrice_confusion(y_true, y_pred)
+  resultat = metriques(cm)
+  precision, recall, f1, _ = precision_recall_fscore_support(y_true, y_pred, labels=labels, zero_division=0)
+  np.testing.assert_allclose(resultat["precision"], precision)
+  np.testing.assert_allclose(resultat["recall"], recall)
+  np.testing.assert_allclose(resultat["f1-score"], f1)
+  assert resultat["accuracy"] == pytest.approx(np.mean(y_true == y_pred))
+
+
+def test_metriques_par_paquet():
+  y_true, y_pred = predictions()
+  cm, _ = matrice_confusion(y_true, y_pred)
+  paquet = bootstrap_confusion(cm, n_resamples=50)
+  assert paquet.shape == (50,) + cm.shape
+  assert (paquet.sum(axis=(1, 2)) == cm.sum()).all()
+  resultat = metriques(paquet)
+  np.testing.assert_allclose(resultat["precision"][7], metriques(paquet[7])["precision"])
+
+
+def test_rapport_bootstrap_contient_les_valeurs_observees():
+  y_true, y_pred = predictions()
+  rapport = rapport_bootstrap(y_true, y_pred, n_resamples=500)
+  assert (rapport.loc[list(CANDIDATS), "f1-score_inf"] <= rapport.loc[list(CANDIDATS), "f1-score"]).all()
+  assert (rapport.loc[list(CANDIDATS), "f1-score"] <= rapport.loc[list(CANDIDATS), "f1-score_sup"]).all()
+  assert rapport.loc["accuracy", "support"] == len(y_true)
+
+
+def test_entrees_invalides():
+  with pytest.raises(ValueError, match="vide"):
+    rapport_bootstrap([], [])
+  with pytest.raises(ValueError, match="longueur"):
+    matrice_confusion(["a", "b"], ["a"])
+  with pytest.raises(ValueError, match="labels"):
+    matrice_confusion(["a", "b"], ["a", "c"], labels=["a", "b"])
+
+
+def test_accuracy_par_periode():
+  dates = pd.to_datetime(["2022-01-03", "2022-01-20", "2022-02-01", "2022-02-14", "2022-02-28"])
+  resultat = accuracy_par_periode(dates, ["a", "b", "a", "a", "b"], ["a", "a", "a", "a", "b"], n_resamples=100)
+  assert list(resultat["nb_tweets"]) == [2, 3]
+  assert list(resultat["accuracy"]) == [0.5, 1.0]
+
+
+def test_accuracy_par_periode_entrees_invalides():
+  with pytest.raises(ValueError, match="NaT"):
+    accuracy_par_periode(pd.to_datetime(["2022-01-03", None]), ["a", "b"], ["a", "b"])
+  with pytest.raises(ValueError, match="Aucun tweet"):
+    accuracy_par_periode(pd.to_datetime([]), [], [])
+  with pytest.raises(ValueError, match="longueur"):
+    accuracy_par_periode(pd.to_datetime(["2022-01-03"]), ["a", "b"], ["a", "b"])
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""Mesures des étapes et rapport JSON de tweets_politiques.instrumentation."""
+
+import json
+import tracemalloc
+
+import pytest
+
+from tweets_politiques.instrumentation import Profileur, _mode_depuis_env
+
+MO = 1024 ** 2
+
+
+@pytest.fixture
+def sans_tracemalloc_residuel():
+  deja_actif = tracemalloc.is_tracing()
+  yield
+  if not deja_actif:
+    tracemalloc.stop()
+
+
+@pytest.mark.parametrize("valeur, mode", [(None, None), ("", None), ("0", None), (" Non ", None), ("false", None),
+                                          ("1", "temps"), ("oui", "temps"),
+                                          ("memoire", "memoire"), ("Mémoire", "memoire"), ("memory", "memoire")])
+def test_mode_depuis_env(valeur, mode):
+  assert _mode_depuis_env(valeur) == mode
+
+
+def test_desactive_ne_mesure_rien(tmp_path):
+  profileur = Profileur(None, dossier=str(tmp_path))
+  with profileur.etape("chargement", nb_lignes=10) as mesure:
+    pass
+  assert not profileur.actif
+  assert mesure.temps_reel is None
+  assert profileur.mesures == []
+  assert profileur.ecrire_rapport() is None
+  assert list(tmp_path.iterdir()) == []
+
+
+def test_lignes_par_seconde():
+  profileur = Profileur("temps")
+  with profileur.etape("sans_lignes"):
+    pass
+  with profileur.etape("filtre") as mesure:
+    mesure.nb_lignes = 1000
+  sans_lignes, filtre = profileur.mesures
+  assert sans_lignes.lignes_par_seconde is None
+  assert sans_lignes.temps_reel >= 0 and sans_lignes.temps_cpu >= 0
+  assert filtre.lignes_par_seconde == pytest.approx(1000 / filtre.temps_reel)
+  # mode temps : pas de pic de mémoire par étape
+  assert filtre.pic_memoire_mo is None
+
+
+def test_pic_memoire_des_etapes_imbriquees(sans_tracemalloc_residuel):
+  profileur = Profileur("memoire")
+  with profileur.etape("englobante"):
+    with profileur.etape("interne"):
+      bloc = bytearray(8 * MO)
+      del bloc
+    with profileur.etape("suivante"):
+      bloc = bytearray(1 * MO)
+      del bloc
+
+  interne, suivante, englobante = profileur.mesures
+  assert [mesure.nom for mesure in profileur.mesures] == ["interne", "suivante", "englobante"]
+  assert interne.pic_memoire_mo >= 7.5
+  # le pic est remis à zéro entre deux étapes...
+  assert 0.9 <= suivante.pic_memoire_mo < 4
+  # ...mais reporté sur l'étape englobante
+  assert englobante.pic_memoire_mo >= 7.5
+
+
+def test_rapport_json(tmp_path):
+  profileur = Profileur("temps", dossier=str(tmp_path / "rapports"))
+  with profileur.etape("nettoyage", nb_lignes=50):
+    pass
+
+  chemin = profileur.ecrire_rapport()
+  assert chemin.startswith(str(tmp_path / "rapports"))
+  with open(chemin, encoding="utf-8") as fichier:
+    rapport = json.load(fichier)
+  assert rapport["mode"] == "temps"
+  assert [etape["etape"] for etape in rapport["etapes"]] == ["nettoyage"]
+  assert rapport["etapes"][0]["nb_lignes"] == 50
+  assert set(rapport["etapes"][0]) == {"etape", "nb_lignes", "temps_reel_s", "temps_cpu_s", "lignes_par_seconde",
+                                       "pic_memoire_mo", "memoire_max_processus_mo"}
+
+  chemin_impose = tmp_path / "profil.json"
+  assert profileur.ecrire_rapport(str(chemin_impose)) == str(chemin_impose)
+  assert chemin_impose.exists()
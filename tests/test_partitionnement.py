@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Découpage en shards et empreintes des checkpoints de tweets_politiques.partitionnement."""
+
+import numpy as np
+import pandas as pd
+
+from tweets_politiques.partitionnement import (MOIS_INCONNU, USER_ID_INCONNU, empreinte, partitionner,
+                                              traiter_corpus)
+
+
+def tweets():
+  return pd.DataFrame({"user_id": ["EmmanuelMacron", "EmmanuelMacron", None, "MLP_officiel", "MLP_officiel"],
+                       "created_at": pd.to_datetime(["2022-03-01 10:00", "2022-04-02 11:00", "2022-03-05 12:00",
+                                                     None, "2022-03-09 08:00"]),
+                       "text": ["un", "deux", "trois", "quatre", "cinq"],
+                       "favorite_count": [1, 2, 3, 4, 5],
+                       "retweet_count": [0, 1, 0, 1, 0]})
+
+
+def test_partitionner_garde_tous_les_tweets():
+  df = tweets()
+  shards = partitionner(df)
+  assert set(shards) == {("EmmanuelMacron", "2022-03"), ("EmmanuelMacron", "2022-04"),
+                         (USER_ID_INCONNU, "2022-03"), ("MLP_officiel", MOIS_INCONNU), ("MLP_officiel", "2022-03")}
+  assert sorted(np.concatenate([df_shard.index for df_shard in shards.values()])) == list(df.index)
+
+
+def test_empreinte_change_avec_le_contenu():
+  df_shard = partitionner(tweets())[("MLP_officiel", "2022-03")]
+  assert empreinte(df_shard) == empreinte(df_shard.copy())
+
+  modifie = df_shard.copy()
+  modifie["text"] = ["six"]
+  assert len(modifie) == len(df_shard)
+  assert empreinte(modifie) != empreinte(df_shard)
+
+  assert empreinte(df_shard.set_axis([10])) != empreinte(df_shard)
+
+
+def test_traiter_corpus_vide(tmp_path):
+  df = tweets().iloc[:0]
+  df_pretraite, agregats = traiter_corpus(df, str(tmp_path / "shards"), processus=1)
+  assert len(df_pretraite) == 0
+  assert list(df_pretraite.columns) == list(df.columns) + ["text_preprocess", "tokens"]
+  assert len(agregats["par_mois"]) == 0
+  assert list(agregats["par_mois"].index.names) == ["user_id", "mois"]
+  assert agregats["frequences"] == {}
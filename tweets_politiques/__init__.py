@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Outils réutilisables pour l'analyse des tweets des candidats à la présidentielle 2022."""
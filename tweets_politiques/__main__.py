@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from tweets_politiques.cli import main
+
+main()
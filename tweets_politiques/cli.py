@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""Ligne de commande : python -m tweets_politiques <commande> ...
+
+Commandes :
+- stats      : indicateurs simples sur la base de tweets (pandas seulement)
+- preprocess : nettoyage, preprocessing spacy et tokenisation, écrit un fichier .pkl ou .csv ;
+               avec --processus / --checkpoints, traitement parallèle par shards (candidat, mois)
+               et reprise après un crash. Avec --tous, tout le corpus est traité.
+- train      : RandomizedSearch TF-IDF + régression logistique sur un fichier prétraité
+- predict    : prédit l'auteur de tweets avec un modèle entraîné
+- suivi      : rejoue un fichier prétraité comme un flux et donne les mots les plus fréquents
+               de chaque candidat sur une fenêtre glissante, en mémoire fixe (esquisses)
+- visualise  : favoris / retweets, nuage de mots ou scattertext
+
+Chaque commande n'importe que ce dont elle a besoin : `stats` ne charge ni spacy ni
+scikit-learn, et rien n'est importé pour afficher l'aide. Le temps de démarrage est
+mesuré par benchmarks/bench_demarrage.py.
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+from tweets_politiques.donnees import DATE_MIN, candidats_select
+from tweets_politiques.instrumentation import etape
+
+
+def _charger(args):
+
+  ''' Charge le fichier de tweets et applique les filtres sur la date et les candidats '''
+  from tweets_politiques.donnees import charger_tweets, filtrer_candidats, filtrer_date
+
+  with etape("chargement") as mesure:
+    df = charger_tweets(args.fichier)
+    mesure.nb_lignes = len(df)
+  print(f"Taille du dataframe : {len(df)}")
+
+  if args.date_min:
+    with etape("filtre_date", nb_lignes=len(df)):
+      df = filtrer_date(df, args.date_min)
+  if args.candidats:
+    with etape("filtre_candidats", nb_lignes=len(df)):
+      df = filtrer_candidats(df, args.candidats)
+  if args.date_min or args.candidats:
+    print(f"Taille du dataframe après filtres : {len(df)}")
+  return df
+
+
+def commande_stats(args):
+  from tweets_politiques.donnees import check_missing_values, print_famous_tweets, statistiques
+
+  df = _charger(args)
+  check_missing_values(df)
+  for nom, resultat in statistiques(df).items():
+    print(f"\n{nom}")
+    print(resultat.to_string())
+  if args.tweets_populaires:
+    userID, nb_favorites = args.tweets_populaires
+    print("\n")
+    print_famous_tweets(df, userID, int(nb_favorites))
+
+
+def commande_preprocess(args):
+  from tweets_politiques.preprocessing import preparer_tokenisation, preprocess_tweets, tokenisation
+
+  # avant tout passage spacy (y compris dans les processus des shards)
+  try:
+    preparer_tokenisation()
+  except RuntimeError as erreur:
+    sys.exit(str(erreur))
+  df = _charger(args).copy()
+
+  if args.processus or args.checkpoints:
+    df = _preprocess_par_shards(df, args)
+  else:
+    with etape("preprocess", nb_lignes=len(df)):
+      df["text_preprocess"] = preprocess_tweets(df["text"], lemmatizing=args.lemmatisation)
+    with etape("tokenisation", nb_lignes=len(df)):
+      df["tokens"] = df["text_preprocess"].apply(tokenisation)
+
+  if args.sortie.endswith(".csv"):
+    df.to_csv(args.sortie, index=False, encoding="utf-8")
+  else:
+    df.to_pickle(args.sortie)
+  print(f"{len(df)} tweets prétraités écrits dans : {args.sortie}")
+
+
+def _preprocess_par_shards(df, args):
+
+  ''' Preprocessing en parallèle par shards (candidat, mois) avec checkpoints '''
+  import pickle
+  from tweets_politiques.partitionnement import traiter_corpus
+
+  dossier = args.checkpoints or args.sortie + ".shards"
+  df, agregats = traiter_corpus(df, dossier, processus=args.processus, lemmatizing=args.lemmatisation)
+  with open(os.path.join(dossier, "agregats.pkl"), "wb") as fichier:
+    pickle.dump(agregats, fichier)
+
+  nb_tweets = agregats["par_mois"].groupby("user_id").nb_tweets.sum()
+  for user_id, frequences in sorted(agregats["frequences"].items()):
+    print(f"\n{user_id} : {nb_tweets[user_id]} tweets, {len(frequences)} mots distincts")
+    print(frequences.most_common(10))
+  print(f"\nAgrégats par candidat et par mois écrits dans : {os.path.join(dossier, 'agregats.pkl')}")
+  return df
+
+
+def commande_train(args):
+  from sklearn.metrics import classification_report
+  from sklearn.model_selection import train_test_split
+  from tweets_politiques.evaluation import accuracy_par_periode, rapport_bootstrap
+  from tweets_politiques.modele import creer_recherche, sauvegarder_modele
+
+  df = _charger(args)
+  df_train, df_test, y_train, y_test = train_test_split(df,
+                                                        df["user_id"],
+                                                        test_size=0.3,
+                                                        random_state=123)
+  print(f"Nombre de tweets dans l'échantillon train : {len(df_train)}")
+  print(f"Nombre de tweets dans l'échantillon test : {len(df_test)}")
+
+  random_search = creer_recherche(n_iter=args.n_iter, cv=args.cv, n_jobs=args.n_jobs)
+  with etape("recherche", nb_lignes=len(df_train)):
+    best_rd_model = random_search.fit(df_train, y_train)
+  print(f"Meilleurs paramètres : {best_rd_model.best_params_}")
+  print(f"Accuracy en cross validation : {best_rd_model.best_score_:.3f}")
+
+  with etape("prediction", nb_lignes=len(df_test)):
+    predictions = best_rd_model.predict(df_test)
+  print(classification_report(y_test, predictions))
+
+  with etape("evaluation", nb_lignes=len(df_test)):
+    rapport = rapport_bootstrap(y_test, predictions, labels=best_rd_model.classes_)
+    par_mois = accuracy_par_periode(df_test["created_at"], y_test, predictions)
+  print("Intervalles de confiance à 95 % (bootstrap) :")
+  print(rapport.round(3).to_string())
+  print("\nAccuracy par mois :")
+  print(par_mois.round(3).to_string())
+
+  sauvegarder_modele(best_rd_model, args.modele)
+  print(f"Modèle enregistré dans : {args.modele}")
+
+
+def commande_predict(args):
+  from tweets_politiques.modele import charger_modele, predire
+
+  textes = list(args.textes)
+  if args.fichier:
+    import pandas as pd
+    df = pd.read_excel(args.fichier) if args.fichier.endswith((".xls", ".xlsx")) else pd.read_csv(args.fichier)
+    textes += df["text"].tolist()
+  if not textes:
+    sys.exit("Aucun tweet à prédire : donner des textes ou --fichier")
+
+  model = charger_modele(args.modele)
+  with etape("prediction", nb_lignes=len(textes)):
+    predictions = predire(model, textes)
+  for prediction, texte in zip(predictions, textes):
+    print("{}\t{}".format(prediction, " ".join(texte.split())))
+
+
+def _verifier_tokens(df):
+
+  ''' Les tokens doivent être des listes : relus depuis un csv, ce sont des textes "['mot', ...]"
+  que les esquisses compteraient caractère par caractère '''
+  if "tokens" not in df:
+    sys.exit("Pas de colonne tokens : utiliser le fichier .pkl écrit par la commande preprocess")
+  if not df["tokens"].map(lambda tokens: isinstance(tokens, (list, tuple))).all():
+    sys.exit("La colonne tokens ne contient pas des listes de mots (fichier csv ?) : "
+             "utiliser le fichier .pkl écrit par la commande preprocess")
+
+
+def commande_suivi(args):
+  import datetime
+  from tweets_politiques.esquisses import SuiviCandidats
+
+  try:
+    suivi = SuiviCandidats(fenetre=datetime.timedelta(days=args.fenetre_jours),
+                           pas=datetime.timedelta(hours=args.pas_heures),
+                           k=args.k)
+  except ValueError as erreur:
+    sys.exit(f"--fenetre-jours / --pas-heures : {erreur}")
+
+  df = _charger(args).sort_values("created_at")
+  _verifier_tokens(df)
+  with etape("suivi", nb_lignes=len(df)):
+    for user_id, created_at, tokens in zip(df["user_id"], df["created_at"], df["tokens"]):
+      suivi.ajouter(user_id, created_at, tokens)
+
+  print(f"Fenêtre de {args.fenetre_jours} jours jusqu'au {suivi.dernier}")
+  for user_id in sorted(suivi.tranches):
+    esquisse = suivi.esquisse(user_id)
+    if esquisse is None:
+      continue
+    print(f"\n{user_id} : {esquisse.nb_tweets} tweets, environ {esquisse.nb_mots_distincts()} mots distincts")
+    print([(mot, compte) for mot, compte, _ in esquisse.top(args.n)])
+
+
+def commande_visualise(args):
+  from tweets_politiques import visualisation
+
+  df = _charger(args)
+  if args.graphique == "favoris":
+    visualisation.visualize_count_favorites(df, args.user_id, fichier=args.sortie)
+  elif args.graphique == "wordcloud":
+    texte = " ".join(df.loc[df.user_id == args.user_id, "text_preprocess"])
+    visualisation.create_wordcloud(texte, args.mots, fichier=args.sortie)
+  else:
+    visualisation.create_scattertext(df, args.category, args.not_category, args.sortie)
+  if args.sortie:
+    print(f"Graphique enregistré dans : {args.sortie}")
+
+
+def _date(texte):
+
+  ''' Valeur de --date-min ("AAAA-MM-JJ" ou "AAAA-MM-JJ HH:MM:SS"), mise au format de filtrer_date '''
+  try:
+    date = datetime.datetime.fromisoformat(texte)
+  except ValueError:
+    raise argparse.ArgumentTypeError(f"date invalide : {texte!r} (attendu AAAA-MM-JJ ou AAAA-MM-JJ HH:MM:SS)")
+  return date.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ajouter_filtres(parser, date_min = None, candidats = None):
+
+  ''' Options de filtre sur la date et les candidats (--tous pour les désactiver) '''
+  parser.add_argument("--date-min", type=_date, default=date_min,
+                      help="garde les tweets à partir de cette date (AAAA-MM-JJ ou AAAA-MM-JJ HH:MM:SS)")
+  parser.add_argument("--candidats", nargs="+", default=candidats, help="user_id des candidats à garder")
+  parser.add_argument("--tous", action="store_true", help="pas de filtre sur la date ni les candidats")
+
+
+def creer_parser():
+  parser = argparse.ArgumentParser(prog="python -m tweets_politiques",
+                                   description="Analyse des tweets des candidats à la présidentielle 2022")
+  commandes = parser.add_subparsers(dest="commande", required=True)
+
+  stats = commandes.add_parser("stats", help="indicateurs simples sur la base de tweets")
+  stats.add_argument("fichier", help="fichier csv des tweets")
+  _ajouter_filtres(stats)
+  stats.add_argument("--tweets-populaires", nargs=2, metavar=("USER_ID", "NB_FAVORIS"),
+                     help="affiche les tweets de USER_ID avec plus de NB_FAVORIS favoris")
+  stats.set_defaults(fonction=commande_stats)
+
+  preprocess = commandes.add_parser("preprocess", help="nettoyage, spacy et tokenisation des tweets")
+  preprocess.add_argument("fichier", help="fichier csv des tweets")
+  preprocess.add_argument("sortie", help="fichier prétraité à écrire (.pkl, ou .csv : tokens écrits en texte, inutilisables par suivi)")
+  _ajouter_filtres(preprocess, DATE_MIN, candidats_select)
+  preprocess.add_argument("--sans-lemmatisation", dest="lemmatisation", action="store_false",
+                          help="garde les tokens entiers au lieu des lemmes")
+  preprocess.add_argument("--processus", type=int, default=None,
+                          help="traite le corpus par shards (candidat, mois) avec ce nombre de processus")
+  preprocess.add_argument("--checkpoints", default=None,
+                          help="dossier des shards terminés, pour reprendre après un crash (défaut : <sortie>.shards)")
+  preprocess.set_defaults(fonction=commande_preprocess)
+
+  train = commandes.add_parser("train", help="entraîne le modèle sur un fichier prétraité")
+  train.add_argument("fichier", help="fichier prétraité (.pkl) produit par la commande preprocess")
+  train.add_argument("modele", help="fichier où enregistrer le modèle")
+  _ajouter_filtres(train)
+  train.add_argument("--n-iter", type=int, default=20)
+  train.add_argument("--cv", type=int, default=5)
+  train.add_argument("--n-jobs", type=int, default=-1)
+  train.set_defaults(fonction=commande_train)
+
+  predict = commandes.add_parser("predict", help="prédit l'auteur de tweets")
+  predict.add_argument("modele", help="modèle enregistré par la commande train")
+  predict.add_argument("textes", nargs="*", help="tweets à prédire")
+  predict.add_argument("--fichier", help="fichier csv ou xlsx avec une colonne text")
+  predict.set_defaults(fonction=commande_predict)
+
+  suivi = commandes.add_parser("suivi", help="mots les plus fréquents par candidat sur une fenêtre glissante")
+  suivi.add_argument("fichier", help="fichier prétraité (.pkl) produit par la commande preprocess")
+  _ajouter_filtres(suivi)
+  suivi.add_argument("--fenetre-jours", type=float, default=7)
+  suivi.add_argument("--pas-heures", type=float, default=24,
+                     help="durée d'une tranche (la fenêtre doit en être un multiple)")
+  suivi.add_argument("--n", type=int, default=10, help="nombre de mots à afficher")
+  suivi.add_argument("--k", type=int, default=1000, help="nombre de compteurs Space-Saving par tranche")
+  suivi.set_defaults(fonction=commande_suivi)
+
+  visualise = commandes.add_parser("visualise", help="graphiques")
+  graphiques = visualise.add_subparsers(dest="graphique", required=True)
+  favoris = graphiques.add_parser("favoris", help="favoris et retweets dans le temps d'un candidat")
+  favoris.add_argument("fichier")
+  favoris.add_argument("user_id")
+  wordcloud = graphiques.add_parser("wordcloud", help="nuage de mots d'un candidat (fichier prétraité)")
+  wordcloud.add_argument("fichier")
+  wordcloud.add_argument("user_id")
+  wordcloud.add_argument("--mots", type=int, default=30, help="nombre de mots du nuage")
+  scattertext = graphiques.add_parser("scattertext", help="compare le vocabulaire de deux candidats (fichier prétraité)")
+  scattertext.add_argument("fichier")
+  scattertext.add_argument("category")
+  scattertext.add_argument("not_category")
+  for graphique in (favoris, wordcloud, scattertext):
+    _ajouter_filtres(graphique)
+    graphique.add_argument("--sortie", required=graphique is scattertext,
+                           help="fichier image (ou html pour scattertext) à écrire au lieu d'afficher")
+  visualise.set_defaults(fonction=commande_visualise)
+
+  return parser
+
+
+def main(argv = None):
+  args = creer_parser().parse_args(argv)
+  if getattr(args, "tous", False):
+    args.date_min = None
+    args.candidats = None
+  args.fonction(args)
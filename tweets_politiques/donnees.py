@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Chargement, filtres et indicateurs simples sur la base de tweets.
+
+pandas et termcolor ne sont importés qu'à l'appel des fonctions.
+"""
+
+import datetime
+
+# Début de la campagne électorale
+DATE_MIN = "2021-09-01 00:00:00"
+
+# Candidats retenus pour que les traitements ne soient pas trop longs
+candidats_select = ["Eric_Zemmour", "Marine_Lepen", "Emmanuel_Macron", "JeanLuc_Melenchon"]
+
+
+def charger_tweets(chemin):
+
+  ''' Lit le fichier de tweets (csv, ou pickle produit par la commande preprocess) et
+  convertit created_at en date '''
+  import pandas as pd
+
+  if chemin.endswith((".pkl", ".pickle")):
+    df = pd.read_pickle(chemin)
+  else:
+    df = pd.read_csv(chemin, encoding="utf-8")
+  df["created_at"] = pd.to_datetime(df["created_at"])
+  return df
+
+
+def filtrer_date(df, date_min = DATE_MIN):
+
+  ''' Garde les tweets envoyés à partir de date_min ("%Y-%m-%d %H:%M:%S") '''
+  import pandas as pd
+
+  date = pd.Timestamp(datetime.datetime.strptime(date_min, "%Y-%m-%d %H:%M:%S"))
+  if df["created_at"].dt.tz is not None:
+    date = date.tz_localize(df["created_at"].dt.tz)
+  return df.loc[df["created_at"] >= date]
+
+
+def filtrer_candidats(df, candidats = None):
+
+  ''' Garde les tweets des candidats sélectionnés (candidats_select par défaut) '''
+  return df.loc[df.user_id.isin(candidats_select if candidats is None else candidats)]
+
+
+def check_missing_values(df):
+  print("check for missing values : ")
+  print(df.isnull().sum()/len(df))
+  return
+
+
+def statistiques(df):
+
+  ''' Indicateurs simples par candidat : nombre de tweets, première / dernière date,
+  distribution des favoris, des retweets et du nombre de mots '''
+  import pandas as pd
+
+  groupes = df.groupby("user_id")
+  return {"nb_tweets": groupes.size().rename("nb_tweets"),
+          "dates": pd.DataFrame({"premier": groupes.created_at.min(), "dernier": groupes.created_at.max()}),
+          "retweet_count": groupes.retweet_count.describe(),
+          "favorite_count": groupes.favorite_count.describe(),
+          "word_count": df["text"].str.split(" ").str.len().groupby(df["user_id"]).describe()}
+
+
+def print_famous_tweets(df, userID, nb_favorites) :
+
+  ''' Cette fonction permet de sélectionner les tweets qui ont eu le plus de favoris
+  pour un user_id donné, et de lire le tweet avec les indicateurs des autres variables de la
+  base de données
+  '''
+  from termcolor import colored
+
+  df_sub = df.loc[(df.user_id==userID) & (df.favorite_count > nb_favorites),:]
+  for irow in range(df_sub.shape[0]):
+      df_row = df_sub.iloc[irow,:]
+
+      print(df_row["created_at"])
+      print("favorite_count={:6} retweet_count={:6}".format(df_row["favorite_count"],df_row["retweet_count"]))
+      print(colored(df_row["text"], 'magenta'))
+      print("\n")
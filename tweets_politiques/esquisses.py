@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""Suivi en flux des mots les plus fréquents par candidat, en mémoire fixe.
+
+get_n_most_common_words a besoin de la liste complète des tokens (nltk.FreqDist). Pour suivre
+la campagne en direct, on utilise des esquisses (sketches) de taille fixe, alimentées tweet
+par tweet, et fusionnables : deux esquisses calculées sur deux parties du flux (deux shards,
+deux machines) donnent par fusion l'esquisse du flux complet.
+
+Bornes d'erreur, avec N le nombre total de mots vus :
+- SpaceSaving (k compteurs) : pour chaque mot suivi, compte - erreur <= vrai compte <= compte,
+  et compte - vrai compte <= N / k. Tout mot de fréquence > N / k est dans le résumé, donc le
+  top-n est exact dès que les fréquences du top-n dépassent nettement N / k.
+- CountMin (largeur w, profondeur d) : vrai compte <= estimation, et estimation <= vrai compte
+  + (e / w) * N avec une probabilité >= 1 - exp(-d). Par défaut w = 2719, d = 5 : erreur
+  <= 0.1 % de N avec une probabilité >= 99.3 %.
+- HyperLogLog (2^p registres) : erreur relative type 1.04 / sqrt(2^p) sur le nombre de mots
+  distincts, soit 1.6 % avec p = 12 (4 Ko).
+
+Le compte d'un mot du top-n est min(SpaceSaving, CountMin) : les deux sont des majorants.
+comparer_exact mesure les erreurs réelles par rapport aux comptes exacts.
+
+Les hash sont calculés avec blake2b (et non hash(), qui change d'un processus à l'autre)
+pour que les esquisses de processus différents soient fusionnables.
+"""
+
+import copy
+import datetime
+import hashlib
+import heapq
+import math
+from collections import Counter
+
+
+def hash64(mot):
+
+  ''' Hash 64 bits stable d'un mot (identique d'un processus à l'autre) '''
+  return int.from_bytes(hashlib.blake2b(mot.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SpaceSaving:
+
+  ''' Résumé Space-Saving : les k mots les plus fréquents avec leur compte et leur erreur maximale '''
+
+  def __init__(self, k = 1000):
+    self.k = k
+    self.n = 0
+    self.compteurs = {}
+    self.erreurs = {}
+    # tas (compte, mot) : un élément par mot suivi, dont le compte peut être en retard
+    self._tas = []
+
+  def _minimum(self):
+
+    ''' Plus petit compte suivi quand le résumé est plein : majorant du compte des mots absents '''
+    if len(self.compteurs) < self.k:
+      return 0
+    while True:
+      compte, mot = self._tas[0]
+      if self.compteurs[mot] == compte:
+        return compte
+      heapq.heapreplace(self._tas, (self.compteurs[mot], mot))
+
+  def ajouter(self, mots):
+    for mot in mots:
+      self.n += 1
+      if mot in self.compteurs:
+        self.compteurs[mot] += 1
+      elif len(self.compteurs) < self.k:
+        self.compteurs[mot] = 1
+        self.erreurs[mot] = 0
+        heapq.heappush(self._tas, (1, mot))
+      else:
+        # le mot remplace celui de plus petit compte, dont il hérite le compte comme erreur
+        minimum = self._minimum()
+        _, remplace = heapq.heappop(self._tas)
+        del self.compteurs[remplace]
+        del self.erreurs[remplace]
+        self.compteurs[mot] = minimum + 1
+        self.erreurs[mot] = minimum
+        heapq.heappush(self._tas, (minimum + 1, mot))
+
+  def fusionner(self, autre):
+
+    ''' Renvoie le résumé du flux réunissant les deux flux (Agarwal et al., Mergeable summaries) :
+    un mot absent d'un résumé y compte pour le minimum de ce résumé. Borne : (N1 + N2) / k '''
+    if self.k != autre.k:
+      raise ValueError("Les résumés Space-Saving doivent avoir le même nombre de compteurs k")
+    minimum, minimum_autre = self._minimum(), autre._minimum()
+    compteurs = {}
+    erreurs = {}
+    for mot in set(self.compteurs) | set(autre.compteurs):
+      compteurs[mot] = self.compteurs.get(mot, minimum) + autre.compteurs.get(mot, minimum_autre)
+      erreurs[mot] = self.erreurs.get(mot, minimum) + autre.erreurs.get(mot, minimum_autre)
+
+    fusion = SpaceSaving(self.k)
+    fusion.n = self.n + autre.n
+    for mot in heapq.nlargest(fusion.k, compteurs, key=compteurs.get):
+      fusion.compteurs[mot] = compteurs[mot]
+      fusion.erreurs[mot] = erreurs[mot]
+    fusion._tas = [(compte, mot) for mot, compte in fusion.compteurs.items()]
+    heapq.heapify(fusion._tas)
+    return fusion
+
+  def top(self, n):
+
+    ''' Les n mots de plus grand compte : [(mot, compte, erreur)] '''
+    return [(mot, self.compteurs[mot], self.erreurs[mot])
+            for mot in heapq.nlargest(n, self.compteurs, key=self.compteurs.get)]
+
+
+class CountMin:
+
+  ''' Esquisse Count-Min : estimation (par excès) du compte de n'importe quel mot '''
+
+  def __init__(self, largeur = 2719, profondeur = 5):
+    self.largeur = largeur
+    self.profondeur = profondeur
+    self.n = 0
+    self.table = [[0] * largeur for _ in range(profondeur)]
+
+  @classmethod
+  def depuis_erreur(cls, epsilon, delta):
+
+    ''' Esquisse dont l'erreur est <= epsilon * N avec une probabilité >= 1 - delta '''
+    return cls(math.ceil(math.e / epsilon), math.ceil(math.log(1 / delta)))
+
+  def _colonnes(self, h):
+    # double hachage (Kirsch-Mitzenmacher) : d fonctions de hash à partir d'un hash 64 bits
+    h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+    return [(h1 + i * h2) % self.largeur for i in range(self.profondeur)]
+
+  def ajouter_hash(self, hashes):
+    for h in hashes:
+      self.n += 1
+      for ligne, colonne in zip(self.table, self._colonnes(h)):
+        ligne[colonne] += 1
+
+  def ajouter(self, mots):
+    self.ajouter_hash(hash64(mot) for mot in mots)
+
+  def estimation(self, mot):
+    return min(ligne[colonne] for ligne, colonne in zip(self.table, self._colonnes(hash64(mot))))
+
+  def fusionner(self, autre):
+    if (self.largeur, self.profondeur) != (autre.largeur, autre.profondeur):
+      raise ValueError("Les esquisses Count-Min doivent avoir la même largeur et la même profondeur")
+    fusion = CountMin(self.largeur, self.profondeur)
+    fusion.n = self.n + autre.n
+    fusion.table = [[a + b for a, b in zip(ligne, ligne_autre)] for ligne, ligne_autre in zip(self.table, autre.table)]
+    return fusion
+
+
+class HyperLogLog:
+
+  ''' Esquisse HyperLogLog : estimation du nombre de mots distincts '''
+
+  def __init__(self, p = 12):
+    self.p = p
+    self.m = 1 << p
+    self.registres = bytearray(self.m)
+
+  def ajouter_hash(self, hashes):
+    bits_restants = 64 - self.p
+    masque = (1 << bits_restants) - 1
+    registres = self.registres
+    for h in hashes:
+      indice = h >> bits_restants
+      # rang du premier bit à 1 dans les bits restants
+      rang = bits_restants - (h & masque).bit_length() + 1
+      if rang > registres[indice]:
+        registres[indice] = rang
+
+  def ajouter(self, mots):
+    self.ajouter_hash(hash64(mot) for mot in mots)
+
+  def estimation(self):
+    alpha = 0.7213 / (1 + 1.079 / self.m)
+    estimation = alpha * self.m ** 2 / sum(2.0 ** -r for r in self.registres)
+    nb_zeros = self.registres.count(0)
+    if estimation <= 2.5 * self.m and nb_zeros:
+      # petites cardinalités : comptage linéaire
+      estimation = self.m * math.log(self.m / nb_zeros)
+    return round(estimation)
+
+  def erreur_type(self):
+    return 1.04 / math.sqrt(self.m)
+
+  def fusionner(self, autre):
+    if self.p != autre.p:
+      raise ValueError("Les esquisses HyperLogLog doivent avoir la même précision p")
+    fusion = HyperLogLog(self.p)
+    fusion.registres = bytearray(map(max, self.registres, autre.registres))
+    return fusion
+
+
+class EsquisseMots:
+
+  ''' Space-Saving + Count-Min + HyperLogLog sur un même flux de mots '''
+
+  def __init__(self, k = 1000, largeur = 2719, profondeur = 5, p = 12):
+    self.nb_tweets = 0
+    self.space_saving = SpaceSaving(k)
+    self.count_min = CountMin(largeur, profondeur)
+    self.hyperloglog = HyperLogLog(p)
+
+  def ajouter(self, mots):
+
+    ''' Ajoute les mots (tokens) d'un tweet '''
+    mots = list(mots)
+    hashes = [hash64(mot) for mot in mots]
+    self.nb_tweets += 1
+    self.space_saving.ajouter(mots)
+    self.count_min.ajouter_hash(hashes)
+    self.hyperloglog.ajouter_hash(hashes)
+
+  def top(self, n):
+
+    ''' Les n mots les plus fréquents : [(mot, compte estimé, borne inférieure du compte)] '''
+    return [(mot, min(compte, self.count_min.estimation(mot)), compte - erreur)
+            for mot, compte, erreur in self.space_saving.top(n)]
+
+  def nb_mots_distincts(self):
+    return self.hyperloglog.estimation()
+
+  def fusionner(self, autre):
+    fusion = EsquisseMots.__new__(EsquisseMots)
+    fusion.nb_tweets = self.nb_tweets + autre.nb_tweets
+    fusion.space_saving = self.space_saving.fusionner(autre.space_saving)
+    fusion.count_min = self.count_min.fusionner(autre.count_min)
+    fusion.hyperloglog = self.hyperloglog.fusionner(autre.hyperloglog)
+    return fusion
+
+
+class SuiviCandidats:
+
+  ''' Top-n des mots et nombre de mots distincts de chaque candidat sur une fenêtre glissante.
+
+  La fenêtre est découpée en tranches de durée `pas` ; chaque tranche a son EsquisseMots et les
+  tranches sorties de la fenêtre (par rapport au tweet le plus récent) sont supprimées : la
+  mémoire est bornée par nb_candidats * (fenetre / pas) esquisses, fenetre devant être un
+  multiple de pas. Les requêtes fusionnent les tranches de la fenêtre. Les tweets arrivant en
+  retard sont acceptés tant que leur tranche est encore dans la fenêtre.
+  '''
+
+  def __init__(self, fenetre = datetime.timedelta(days=7), pas = datetime.timedelta(days=1), **parametres):
+    if fenetre < pas:
+      raise ValueError("La fenêtre doit être plus longue que le pas")
+    # sinon l'acceptation des tweets en retard et l'expiration des tranches ne couvrent pas la même fenêtre
+    if fenetre % pas:
+      raise ValueError(f"La fenêtre ({fenetre}) doit être un multiple du pas ({pas})")
+    self.fenetre = fenetre
+    self.pas = pas
+    self.parametres = parametres
+    self.tranches = {}
+    self.dernier = None
+
+  def _debut_tranche(self, date):
+    origine = datetime.datetime(2000, 1, 1, tzinfo=date.tzinfo)
+    return date - (date - origine) % self.pas
+
+  def _expirer(self):
+    horizon = self._debut_tranche(self.dernier) - self.fenetre + self.pas
+    for tranches in self.tranches.values():
+      for debut in [debut for debut in tranches if debut < horizon]:
+        del tranches[debut]
+
+  def ajouter(self, user_id, created_at, mots):
+
+    ''' Ajoute un tweet (tokens) d'un candidat. Renvoie False si le tweet est trop ancien pour la fenêtre '''
+    debut = self._debut_tranche(created_at)
+    if self.dernier is not None and debut <= self._debut_tranche(self.dernier) - self.fenetre:
+      return False
+    tranches = self.tranches.setdefault(user_id, {})
+    if debut not in tranches:
+      tranches[debut] = EsquisseMots(**self.parametres)
+    tranches[debut].ajouter(mots)
+    if self.dernier is None or created_at > self.dernier:
+      nouvelle_tranche = self.dernier is None or debut > self._debut_tranche(self.dernier)
+      self.dernier = created_at
+      if nouvelle_tranche:
+        self._expirer()
+    return True
+
+  def esquisse(self, user_id):
+
+    ''' Esquisse de la fenêtre courante d'un candidat (fusion de ses tranches), None si aucun tweet '''
+    esquisse = None
+    for tranche in self.tranches.get(user_id, {}).values():
+      esquisse = tranche if esquisse is None else esquisse.fusionner(tranche)
+    return esquisse
+
+  def top_mots(self, user_id, n = 10):
+    esquisse = self.esquisse(user_id)
+    return [] if esquisse is None else esquisse.top(n)
+
+  def nb_mots_distincts(self, user_id):
+    esquisse = self.esquisse(user_id)
+    return 0 if esquisse is None else esquisse.nb_mots_distincts()
+
+  def fusionner(self, autre):
+
+    ''' Fusionne le suivi d'un autre flux (autre shard) avec les mêmes fenêtre, pas et paramètres '''
+    if (self.fenetre, self.pas, self.parametres) != (autre.fenetre, autre.pas, autre.parametres):
+      raise ValueError("Les suivis doivent avoir la même fenêtre, le même pas et les mêmes paramètres")
+    fusion = SuiviCandidats(self.fenetre, self.pas, **self.parametres)
+    for suivi in (self, autre):
+      for user_id, tranches in suivi.tranches.items():
+        tranches_fusion = fusion.tranches.setdefault(user_id, {})
+        for debut, esquisse in tranches.items():
+          # copie d'une tranche présente d'un seul côté : la fusion ne partage pas d'esquisse avec les suivis fusionnés
+          tranches_fusion[debut] = (copy.deepcopy(esquisse) if debut not in tranches_fusion
+                                    else tranches_fusion[debut].fusionner(esquisse))
+    derniers = [suivi.dernier for suivi in (self, autre) if suivi.dernier is not None]
+    fusion.dernier = max(derniers) if derniers else None
+    if fusion.dernier is not None:
+      fusion._expirer()
+    return fusion
+
+
+def comparer_exact(list_words, n = 10, **parametres):
+
+  ''' Compare l'esquisse d'une liste de mots aux comptes exacts : erreurs observées sur le
+  top-n et sur le nombre de mots distincts, à côté des bornes théoriques '''
+  esquisse = EsquisseMots(**parametres)
+  esquisse.ajouter(list_words)
+  exact = Counter(list_words)
+
+  top_exact = exact.most_common(n)
+  top_approche = esquisse.top(n)
+  nb_total = len(list_words)
+  nb_distincts = len(exact)
+  erreurs_space_saving = [compte - exact[mot] for mot, compte, _ in esquisse.space_saving.top(n)]
+  erreurs_count_min = [esquisse.count_min.estimation(mot) - compte for mot, compte in top_exact]
+
+  return {"top_exact": top_exact,
+          "top_approche": top_approche,
+          "rappel_top_n": len({mot for mot, _ in top_exact} & {mot for mot, _, _ in top_approche}) / max(len(top_exact), 1),
+          "erreur_max_space_saving": max(erreurs_space_saving, default=0),
+          "borne_space_saving": nb_total / esquisse.space_saving.k,
+          "erreur_max_count_min": max(erreurs_count_min, default=0),
+          "borne_count_min": math.e / esquisse.count_min.largeur * nb_total,
+          "nb_mots_distincts": nb_distincts,
+          "nb_mots_distincts_estime": esquisse.nb_mots_distincts(),
+          "erreur_relative_distincts": abs(esquisse.nb_mots_distincts() - nb_distincts) / max(nb_distincts, 1),
+          "erreur_type_hyperloglog": esquisse.hyperloglog.erreur_type()}
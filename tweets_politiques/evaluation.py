@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Evaluation du classifieur avec intervalles de confiance bootstrap.
+
+Les métriques (precision, recall, F1 par candidat, accuracy) ne dépendent que de la matrice
+de confusion. Rééchantillonner les n tweets du test avec remise revient donc à tirer les
+comptes de la matrice de confusion selon une loi multinomiale de paramètres n et
+(matrice / n) : les milliers de rééchantillonnages sont tirés d'un coup par numpy, sans
+réentraîner le modèle ni boucler sur les tweets. Le coût ne dépend de n que pour le calcul
+de la matrice de confusion (un bincount), ce qui reste rapide pour des centaines de
+milliers de tweets.
+
+De même, l'accuracy par période (mois par défaut) est rééchantillonnée avec une loi
+binomiale par période.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _encoder(y_true, y_pred, labels = None):
+
+  ''' Codes entiers des classes observées et prédites, dans l'ordre de labels '''
+  y_true = np.asarray(y_true)
+  y_pred = np.asarray(y_pred)
+  if len(y_true) != len(y_pred):
+    raise ValueError(f"y_true et y_pred n'ont pas la même longueur ({len(y_true)} et {len(y_pred)})")
+  if labels is None:
+    labels = np.sort(pd.unique(np.concatenate([y_true, y_pred])))
+  labels = np.asarray(labels)
+
+  index = pd.Index(labels)
+  codes = []
+  for y in (y_true, y_pred):
+    codes_y = index.get_indexer(y).astype(np.int64)
+    if (codes_y < 0).any():
+      raise ValueError("Certaines classes de y_true ou y_pred ne sont pas dans labels")
+    codes.append(codes_y)
+  return codes[0], codes[1], labels
+
+
+def matrice_confusion(y_true, y_pred, labels = None):
+
+  ''' Matrice de confusion (lignes : classes observées, colonnes : classes prédites) et labels '''
+  codes_true, codes_pred, labels = _encoder(y_true, y_pred, labels)
+  nb_classes = len(labels)
+  cm = np.bincount(codes_true * nb_classes + codes_pred, minlength=nb_classes ** 2)
+  return cm.reshape(nb_classes, nb_classes), labels
+
+
+def _diviser(numerateur, denominateur):
+  # 0 quand le dénominateur est nul, comme zero_division=0 dans sklearn
+  return np.divide(numerateur, denominateur, out=np.zeros(np.broadcast(numerateur, denominateur).shape),
+                   where=denominateur != 0)
+
+
+def metriques(cm):
+
+  ''' Precision, recall, F1 par classe et accuracy, calculés sur les deux derniers axes de cm :
+  cm peut être une matrice (K, K) ou un paquet de matrices (B, K, K) '''
+  cm = np.asarray(cm, dtype=np.float64)
+  vrais_positifs = np.diagonal(cm, axis1=-2, axis2=-1)
+  precision = _diviser(vrais_positifs, cm.sum(axis=-2))
+  recall = _diviser(vrais_positifs, cm.sum(axis=-1))
+  f1 = _diviser(2 * precision * recall, precision + recall)
+  accuracy = _diviser(vrais_positifs.sum(axis=-1), cm.sum(axis=(-2, -1)))
+  return {"precision": precision, "recall": recall, "f1-score": f1, "accuracy": accuracy}
+
+
+def bootstrap_confusion(cm, n_resamples = 2000, seed = 0):
+
+  ''' n_resamples matrices de confusion bootstrap (n_resamples, K, K) : chaque matrice est celle
+  d'un rééchantillonnage avec remise des tweets du test '''
+  cm = np.asarray(cm)
+  n = cm.sum()
+  if n == 0:
+    raise ValueError("Matrice de confusion vide : il faut au moins un tweet de test pour le bootstrap")
+  rng = np.random.default_rng(seed)
+  tirages = rng.multinomial(n, cm.ravel() / n, size=n_resamples)
+  return tirages.reshape((n_resamples,) + cm.shape)
+
+
+def rapport_bootstrap(y_true, y_pred, labels = None, n_resamples = 2000, niveau = 0.95, seed = 0):
+
+  ''' Equivalent de classification_report avec les intervalles de confiance bootstrap
+  (percentiles) de la precision, du recall et du F1 de chaque classe et de l'accuracy '''
+  cm, labels = matrice_confusion(y_true, y_pred, labels)
+  observees = metriques(cm)
+  bootstrap = metriques(bootstrap_confusion(cm, n_resamples, seed))
+  alpha = (1 - niveau) / 2
+
+  rapport = pd.DataFrame(index=pd.Index(list(labels) + ["accuracy"]))
+  for nom in ("precision", "recall", "f1-score"):
+    inf, sup = np.quantile(bootstrap[nom], [alpha, 1 - alpha], axis=0)
+    rapport[nom] = list(observees[nom]) + [np.nan]
+    rapport[f"{nom}_inf"] = list(inf) + [np.nan]
+    rapport[f"{nom}_sup"] = list(sup) + [np.nan]
+  inf, sup = np.quantile(bootstrap["accuracy"], [alpha, 1 - alpha])
+  # comme dans classification_report, l'accuracy est dans la colonne f1-score
+  rapport.loc["accuracy", ["f1-score", "f1-score_inf", "f1-score_sup"]] = [observees["accuracy"], inf, sup]
+  rapport["support"] = list(cm.sum(axis=1)) + [cm.sum()]
+  return rapport
+
+
+def accuracy_par_periode(dates, y_true, y_pred, frequence = "M", n_resamples = 2000, niveau = 0.95, seed = 0):
+
+  ''' Accuracy par période (frequence pandas : "M" pour le mois, "W" pour la semaine...) avec
+  son intervalle de confiance bootstrap '''
+  dates = pd.to_datetime(pd.Series(dates))
+  y_true, y_pred = np.asarray(y_true), np.asarray(y_pred)
+  if not len(dates) == len(y_true) == len(y_pred):
+    raise ValueError(f"dates, y_true et y_pred n'ont pas la même longueur ({len(dates)}, {len(y_true)} et {len(y_pred)})")
+  if len(dates) == 0:
+    raise ValueError("Aucun tweet : impossible de calculer l'accuracy par période")
+  if dates.isna().any():
+    raise ValueError(f"{dates.isna().sum()} dates manquantes (NaT) : les retirer avant l'évaluation par période")
+
+  periodes = pd.PeriodIndex(dates.dt.tz_localize(None), freq=frequence)
+  codes, index = pd.factorize(periodes, sort=True)
+  corrects = (y_true == y_pred)
+
+  nb_tweets = np.bincount(codes, minlength=len(index))
+  nb_corrects = np.bincount(codes, weights=corrects, minlength=len(index))
+  accuracy = nb_corrects / nb_tweets
+
+  rng = np.random.default_rng(seed)
+  bootstrap = rng.binomial(nb_tweets, accuracy, size=(n_resamples, len(index))) / nb_tweets
+  alpha = (1 - niveau) / 2
+  inf, sup = np.quantile(bootstrap, [alpha, 1 - alpha], axis=0)
+
+  return pd.DataFrame({"nb_tweets": nb_tweets, "accuracy": accuracy,
+                       "accuracy_inf": inf, "accuracy_sup": sup}, index=index)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""Instrumentation des étapes du pipeline d'analyse des tweets.
+
+Chaque étape (chargement, filtres, nettoyage, spacy, tokenisation, vectorisation,
+recherche, prédiction) est entourée par le gestionnaire de contexte `etape`, qui mesure :
+- le temps réel et le temps CPU ;
+- le pic de mémoire Python de l'étape et la mémoire maximale du processus ;
+- le débit en lignes par seconde quand le nombre de lignes traitées est connu.
+
+L'instrumentation est désactivée par défaut (coût quasi nul) et s'active sans toucher
+au code grâce aux variables d'environnement :
+- ANALYSE_TWEETS_PROFIL=1          : temps réel, temps CPU, mémoire max du processus
+- ANALYSE_TWEETS_PROFIL=memoire    : en plus, pic de mémoire par étape (tracemalloc, plus lent)
+- ANALYSE_TWEETS_RAPPORTS=dossier  : dossier du rapport JSON (défaut : rapports_profilage)
+
+Un rapport JSON est écrit à la fin de chaque exécution.
+
+NB : le temps CPU ne compte que le processus courant, pas les processus fils
+(ex : RandomizedSearchCV avec n_jobs=-1).
+"""
+
+import atexit
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+  import resource
+except ImportError:  # indisponible sous Windows
+  resource = None
+
+VAR_PROFIL = "ANALYSE_TWEETS_PROFIL"
+VAR_RAPPORTS = "ANALYSE_TWEETS_RAPPORTS"
+DOSSIER_RAPPORTS = "rapports_profilage"
+
+
+def _mode_depuis_env(valeur):
+
+  ''' Traduit la valeur de la variable d'environnement en mode d'instrumentation '''
+  if valeur is None or valeur.strip().lower() in ("", "0", "non", "false"):
+    return None
+  if valeur.strip().lower() in ("memoire", "mémoire", "memory"):
+    return "memoire"
+  return "temps"
+
+
+def _memoire_max_processus():
+
+  ''' Mémoire résidente maximale atteinte par le processus, en Mo (None si indisponible) '''
+  if resource is None:
+    return None
+  maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  # ru_maxrss est en octets sous macOS et en kilo-octets sous Linux
+  if sys.platform == "darwin":
+    return maxrss / 1024 ** 2
+  return maxrss / 1024
+
+
+class Mesure:
+
+  ''' Mesures d'une étape. nb_lignes peut être renseigné à l'intérieur du bloc `with`
+  quand il n'est connu qu'à la fin de l'étape (ex : taille après un filtre) '''
+
+  def __init__(self, nom, nb_lignes=None):
+    self.nom = nom
+    self.nb_lignes = nb_lignes
+    self.temps_reel = None
+    self.temps_cpu = None
+    self.pic_memoire_mo = None
+    self.memoire_max_processus_mo = None
+    self._pic_octets = 0
+
+  @property
+  def lignes_par_seconde(self):
+    if not self.nb_lignes or not self.temps_reel:
+      return None
+    return self.nb_lignes / self.temps_reel
+
+  def en_dict(self):
+    return {"etape": self.nom,
+            "nb_lignes": self.nb_lignes,
+            "temps_reel_s": self.temps_reel,
+            "temps_cpu_s": self.temps_cpu,
+            "lignes_par_seconde": self.lignes_par_seconde,
+            "pic_memoire_mo": self.pic_memoire_mo,
+            "memoire_max_processus_mo": self.memoire_max_processus_mo}
+
+
+class Profileur:
+
+  ''' Collecte les mesures des étapes d'une exécution et écrit le rapport JSON.
+  mode vaut None (désactivé), "temps" ou "memoire" '''
+
+  def __init__(self, mode=None, dossier=None):
+    self.mode = mode
+    self.dossier = dossier or DOSSIER_RAPPORTS
+    self.mesures = []
+    self.debut = datetime.datetime.now()
+    self._en_cours = []
+    self._rapport_ecrit = False
+
+  @property
+  def actif(self):
+    return self.mode is not None
+
+  @contextmanager
+  def etape(self, nom, nb_lignes=None):
+
+    ''' Mesure le bloc de code d'une étape du pipeline '''
+    mesure = Mesure(nom, nb_lignes)
+    if not self.actif:
+      yield mesure
+      return
+
+    trace_memoire = self.mode == "memoire"
+    if trace_memoire:
+      if not tracemalloc.is_tracing():
+        tracemalloc.start()
+      # le pic est remis à zéro pour l'étape : on le reporte d'abord sur les étapes englobantes
+      pic_courant = tracemalloc.get_traced_memory()[1]
+      for parent in self._en_cours:
+        parent._pic_octets = max(parent._pic_octets, pic_courant)
+      tracemalloc.reset_peak()
+      memoire_debut = tracemalloc.get_traced_memory()[0]
+
+    self._en_cours.append(mesure)
+    debut_reel = time.perf_counter()
+    debut_cpu = time.process_time()
+    try:
+      yield mesure
+    finally:
+      mesure.temps_reel = time.perf_counter() - debut_reel
+      mesure.temps_cpu = time.process_time() - debut_cpu
+      self._en_cours.pop()
+      if trace_memoire:
+        pic = max(mesure._pic_octets, tracemalloc.get_traced_memory()[1])
+        mesure.pic_memoire_mo = max(pic - memoire_debut, 0) / 1024 ** 2
+        for parent in self._en_cours:
+          parent._pic_octets = max(parent._pic_octets, pic)
+      mesure.memoire_max_processus_mo = _memoire_max_processus()
+      self.mesures.append(mesure)
+
+  def rapport(self):
+
+    ''' Rapport de l'exécution, sérialisable en JSON '''
+    return {"debut": self.debut.isoformat(timespec="seconds"),
+            "fin": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commande": " ".join(sys.argv),
+            "mode": self.mode,
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "nb_processeurs": os.cpu_count(),
+            "etapes": [mesure.en_dict() for mesure in self.mesures]}
+
+  def ecrire_rapport(self, chemin=None):
+
+    ''' Ecrit le rapport JSON de l'exécution et renvoie son chemin (None si désactivé) '''
+    if not self.actif:
+      return None
+    if chemin is None:
+      nom_fichier = "profil_{}_{}.json".format(self.debut.strftime("%Y%m%d-%H%M%S"), os.getpid())
+      chemin = os.path.join(self.dossier, nom_fichier)
+    dossier = os.path.dirname(chemin)
+    if dossier:
+      os.makedirs(dossier, exist_ok=True)
+    with open(chemin, "w", encoding="utf-8") as fichier:
+      json.dump(self.rapport(), fichier, ensure_ascii=False, indent=2)
+    self._rapport_ecrit = True
+    return chemin
+
+  def resume(self):
+
+    ''' Tableau texte des mesures, pour un affichage rapide '''
+    lignes = ["{:<20} {:>10} {:>10} {:>12} {:>10}".format("etape", "reel (s)", "cpu (s)", "lignes/s", "pic (Mo)")]
+    for mesure in self.mesures:
+      debit = mesure.lignes_par_seconde
+      lignes.append("{:<20} {:>10.2f} {:>10.2f} {:>12} {:>10}".format(
+          mesure.nom, mesure.temps_reel, mesure.temps_cpu,
+          "-" if debit is None else "{:.0f}".format(debit),
+          "-" if mesure.pic_memoire_mo is None else "{:.1f}".format(mesure.pic_memoire_mo)))
+    return "\n".join(lignes)
+
+
+PROFILEUR = Profileur(_mode_depuis_env(os.environ.get(VAR_PROFIL)), os.environ.get(VAR_RAPPORTS))
+
+
+def etape(nom, nb_lignes=None):
+
+  ''' Mesure une étape avec le profileur global (sans effet si l'instrumentation est désactivée) '''
+  return PROFILEUR.etape(nom, nb_lignes)
+
+
+def ecrire_rapport(chemin=None):
+  return PROFILEUR.ecrire_rapport(chemin)
+
+
+def _ecrire_rapport_a_la_sortie():
+  if PROFILEUR.actif and not PROFILEUR._rapport_ecrit and PROFILEUR.mesures:
+    PROFILEUR.ecrire_rapport()
+
+
+atexit.register(_ecrire_rapport_a_la_sortie)
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Modèle de prédiction de l'auteur d'un tweet : TF-IDF sur text_preprocess + régression logistique.
+
+scikit-learn n'est importé qu'à l'appel des fonctions.
+"""
+
+# Paramètres testés par défaut par la RandomizedSearch (multi_class est ajouté par
+# parametres_recherche quand la version de scikit-learn l'accepte)
+DICT_PARAMS = dict(prep__text_preprocess__max_df=[0.99, 0.95, 0.9],
+                   prep__text_preprocess__min_df=[2, 5, 10],
+                   clf__C = [1, 20, 50],
+                   clf__penalty = ['l2'])
+
+
+def _accepte_multi_class():
+
+  ''' multi_class de LogisticRegression est déprécié depuis scikit-learn 1.5 puis supprimé '''
+  from importlib.metadata import version
+
+  majeure, mineure = (int(numero) for numero in version("scikit-learn").split(".")[:2])
+  return (majeure, mineure) < (1, 5)
+
+
+def parametres_recherche():
+
+  ''' Grille de paramètres par défaut de la RandomizedSearch, adaptée à la version de scikit-learn '''
+  dict_params = dict(DICT_PARAMS)
+  if _accepte_multi_class():
+    dict_params["clf__multi_class"] = ['ovr', 'multinomial']
+  return dict_params
+
+
+def creer_pipeline():
+
+  ''' Pipeline qui combine la vectorisation TF-IDF de la colonne text_preprocess et le modèle '''
+  from sklearn.compose import ColumnTransformer
+  from sklearn.feature_extraction.text import TfidfVectorizer
+  from sklearn.linear_model import LogisticRegression
+  from sklearn.pipeline import Pipeline
+
+  # Vectorisation de la variable text_preprocess
+  text_transformer_tfidf =  TfidfVectorizer()
+  preprocess = ColumnTransformer([("text_preprocess", text_transformer_tfidf, "text_preprocess")],
+                                 remainder="drop")
+
+  # Type de modèle à tester
+  model = LogisticRegression(random_state=54269, max_iter=1000)
+
+  return Pipeline(steps=[('prep',preprocess),
+                         ('clf', model)])
+
+
+def creer_recherche(dict_params = None, n_iter = 20, cv = 5, n_jobs = -1, verbose = 1):
+
+  ''' RandomizedSearch sur la pipeline, avec cross validation '''
+  from sklearn.model_selection import RandomizedSearchCV
+
+  return RandomizedSearchCV(creer_pipeline(),
+                            parametres_recherche() if dict_params is None else dict_params,
+                            cv=cv,
+                            n_iter=n_iter,
+                            random_state=5439676,
+                            n_jobs=n_jobs,
+                            verbose=verbose)
+
+
+def sauvegarder_modele(model, chemin):
+
+  ''' Enregistre le modèle entraîné (joblib) '''
+  import joblib
+  joblib.dump(model, chemin)
+
+
+def charger_modele(chemin):
+  import joblib
+  return joblib.load(chemin)
+
+
+def predire(model, textes):
+
+  ''' Prédit l'auteur de tweets bruts : preprocessing (lemmatisation) puis prédiction '''
+  import pandas as pd
+  from tweets_politiques.preprocessing import preprocess_tweets
+
+  df = pd.DataFrame({"text": list(textes)})
+  df["text_preprocess"] = preprocess_tweets(df["text"], lemmatizing=True)
+  return model.predict(df)
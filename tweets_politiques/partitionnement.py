@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""Traitement du corpus complet, découpé en shards par candidat et par mois.
+
+Chaque shard (user_id, mois) est traité dans un pool de processus : nettoyage par regexp,
+preprocessing spacy, tokenisation et agrégations (nombre de tweets, de mots, favoris,
+retweets, fréquence des mots). Chaque processus charge le modèle spacy une seule fois.
+
+Un shard terminé est enregistré dans le dossier de checkpoints (un fichier .pkl par shard)
+et noté dans manifeste.json : après un crash, relancer la même commande ne retraite que les
+shards manquants. Chaque shard y est noté avec une empreinte de son contenu (hash des lignes
+et de l'index) : un shard dont le contenu a changé est retraité, même si son nombre de
+tweets est le même.
+
+Les tweets sans user_id ou sans date ne sont pas perdus : ils vont dans les shards
+"_inconnu" (candidat) et "_sans_date" (mois).
+
+Les résultats des shards sont ensuite fusionnés : DataFrame des tweets prétraités (dans
+l'ordre d'origine) et agrégats par candidat, dont les fréquences des mots sont la somme
+des fréquences de chaque shard.
+"""
+
+import json
+import os
+import pickle
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from tweets_politiques.instrumentation import etape
+
+NOM_MANIFESTE = "manifeste.json"
+USER_ID_INCONNU = "_inconnu"
+MOIS_INCONNU = "_sans_date"
+
+
+def nom_shard(user_id, mois):
+  return f"{user_id}__{mois}"
+
+
+def partitionner(df):
+
+  ''' Découpe les tweets par candidat et par mois : {(user_id, "AAAA-MM"): DataFrame}.
+  Les tweets sans user_id ou sans date sont gardés dans des shards à part '''
+  user_id = df["user_id"].astype(object).where(df["user_id"].notna(), USER_ID_INCONNU)
+  mois = df["created_at"].dt.strftime("%Y-%m").fillna(MOIS_INCONNU)
+  nb_incomplets = int((df["user_id"].isna() | df["created_at"].isna()).sum())
+  if nb_incomplets:
+    print(f"Attention : {nb_incomplets} tweets sans user_id ou sans date, "
+          f"gardés dans les shards {USER_ID_INCONNU} / {MOIS_INCONNU}")
+  return {(user_id_shard, mois_shard): df_shard
+          for (user_id_shard, mois_shard), df_shard in df.groupby([user_id, mois], sort=False)}
+
+
+def empreinte(df_shard):
+
+  ''' Empreinte du contenu d'un shard (lignes et index), pour savoir si son checkpoint est à jour '''
+  import pandas as pd
+  return format(int(pd.util.hash_pandas_object(df_shard, index=True).sum()), "016x")
+
+
+def _ecrire_atomique(chemin, ecrire):
+
+  ''' Ecrit dans un fichier temporaire puis le renomme : un crash ne laisse pas de fichier à moitié écrit '''
+  temporaire = chemin + ".tmp"
+  ecrire(temporaire)
+  os.replace(temporaire, chemin)
+
+
+def _ecrire_pickle(chemin, objet):
+  def ecrire(temporaire):
+    with open(temporaire, "wb") as fichier:
+      pickle.dump(objet, fichier, protocol=pickle.HIGHEST_PROTOCOL)
+  _ecrire_atomique(chemin, ecrire)
+
+
+def _ecrire_manifeste(dossier, manifeste):
+  def ecrire(temporaire):
+    with open(temporaire, "w", encoding="utf-8") as fichier:
+      json.dump(manifeste, fichier, ensure_ascii=False, indent=2)
+  _ecrire_atomique(os.path.join(dossier, NOM_MANIFESTE), ecrire)
+
+
+def _initialiser_processus():
+
+  ''' Chargement du modèle spacy une fois par processus '''
+  from tweets_politiques.preprocessing import charger_nlp
+  charger_nlp()
+
+
+def traiter_shard(cle, df_shard, chemin, lemmatizing = True):
+
+  ''' Prétraite un shard, calcule ses agrégats et l'enregistre dans `chemin`.
+  Renvoie la clé du shard, son nombre de tweets et le temps de traitement '''
+  from tweets_politiques.preprocessing import preprocess_tweets, tokenisation
+
+  debut = time.perf_counter()
+  df_shard = df_shard.copy()
+  df_shard["text_preprocess"] = preprocess_tweets(df_shard["text"], lemmatizing=lemmatizing)
+  df_shard["tokens"] = df_shard["text_preprocess"].apply(tokenisation)
+
+  frequences = Counter()
+  for tokens in df_shard["tokens"]:
+    frequences.update(tokens)
+  agregats = {"user_id": cle[0],
+              "mois": cle[1],
+              "nb_tweets": len(df_shard),
+              "nb_mots": sum(frequences.values()),
+              "favorite_count": int(df_shard["favorite_count"].sum()),
+              "retweet_count": int(df_shard["retweet_count"].sum()),
+              "frequences": frequences}
+
+  _ecrire_pickle(chemin, {"tweets": df_shard, "agregats": agregats})
+  return cle, len(df_shard), time.perf_counter() - debut
+
+
+def _lire_manifeste(dossier, lemmatizing):
+  chemin = os.path.join(dossier, NOM_MANIFESTE)
+  if not os.path.exists(chemin):
+    return {"lemmatizing": lemmatizing, "shards": {}}
+  with open(chemin, encoding="utf-8") as fichier:
+    manifeste = json.load(fichier)
+  if manifeste["lemmatizing"] != lemmatizing:
+    raise ValueError(f"Les checkpoints de {dossier} ont été calculés avec lemmatizing={manifeste['lemmatizing']} : "
+                     "utiliser un autre dossier")
+  return manifeste
+
+
+def traiter_corpus(df, dossier, processus = None, lemmatizing = True):
+
+  ''' Traite tous les shards du corpus en parallèle (processus : nombre de processus,
+  tous les coeurs par défaut), en reprenant les shards déjà enregistrés dans `dossier`.
+  Renvoie le DataFrame prétraité et les agrégats fusionnés (voir fusionner) '''
+  os.makedirs(dossier, exist_ok=True)
+  manifeste = _lire_manifeste(dossier, lemmatizing)
+
+  with etape("partitionnement", nb_lignes=len(df)):
+    shards = partitionner(df)
+
+  chemins = {cle: os.path.join(dossier, nom_shard(*cle) + ".pkl") for cle in shards}
+  with etape("empreintes", nb_lignes=len(df)):
+    empreintes = {cle: empreinte(df_shard) for cle, df_shard in shards.items()}
+  a_traiter = [cle for cle in shards
+               if manifeste["shards"].get(nom_shard(*cle), {}).get("empreinte") != empreintes[cle]
+               or not os.path.exists(chemins[cle])]
+  print(f"{len(shards)} shards, {len(shards) - len(a_traiter)} déjà traités, {len(a_traiter)} à traiter")
+
+  nb_lignes = sum(len(shards[cle]) for cle in a_traiter)
+  with etape("shards", nb_lignes=nb_lignes):
+    with ProcessPoolExecutor(max_workers=processus, initializer=_initialiser_processus) as pool:
+      # les plus gros shards d'abord, pour mieux répartir la charge entre les processus
+      futures = [pool.submit(traiter_shard, cle, shards[cle], chemins[cle], lemmatizing)
+                 for cle in sorted(a_traiter, key=lambda cle: -len(shards[cle]))]
+      for nb_termines, future in enumerate(as_completed(futures), start=1):
+        cle, nb_tweets, temps = future.result()
+        manifeste["shards"][nom_shard(*cle)] = {"nb_tweets": nb_tweets, "empreinte": empreintes[cle],
+                                                "temps_s": round(temps, 3)}
+        _ecrire_manifeste(dossier, manifeste)
+        print(f"[{nb_termines}/{len(a_traiter)}] {nom_shard(*cle)} : {nb_tweets} tweets en {temps:.1f} s")
+
+  with etape("fusion", nb_lignes=len(df)):
+    df_fusion, agregats = fusionner([chemins[cle] for cle in shards])
+  if not shards:
+    df_fusion = df.reindex(columns=list(df.columns) + list(df_fusion.columns))
+  return df_fusion, agregats
+
+
+def fusionner(chemins):
+
+  ''' Fusionne les shards enregistrés. Renvoie le DataFrame des tweets prétraités (ordre
+  d'origine) et les agrégats : un DataFrame par (user_id, mois) et les fréquences des
+  mots de chaque candidat (Counter). Sans shard, les DataFrame sont vides '''
+  import pandas as pd
+
+  tweets = []
+  lignes = []
+  frequences = {}
+  for chemin in chemins:
+    with open(chemin, "rb") as fichier:
+      shard = pickle.load(fichier)
+    tweets.append(shard["tweets"])
+    agregats = dict(shard["agregats"])
+    frequences.setdefault(agregats["user_id"], Counter()).update(agregats.pop("frequences"))
+    lignes.append(agregats)
+
+  if not chemins:
+    # corpus vide (par exemple filtré sur un candidat sans tweet) : mêmes colonnes que les shards
+    df = pd.DataFrame(columns=["text_preprocess", "tokens"])
+    par_mois = pd.DataFrame(columns=["user_id", "mois", "nb_tweets", "nb_mots", "favorite_count",
+                                     "retweet_count"]).set_index(["user_id", "mois"])
+    return df, {"par_mois": par_mois, "frequences": frequences}
+
+  df = pd.concat(tweets).sort_index()
+  par_mois = pd.DataFrame(lignes).set_index(["user_id", "mois"]).sort_index()
+  return df, {"par_mois": par_mois, "frequences": frequences}
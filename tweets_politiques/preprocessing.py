@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""Nettoyage, preprocessing spacy et tokenisation des tweets.
+
+Le modèle spacy (fr_core_news_md) et nltk ne sont importés qu'au premier usage :
+importer ce module ne coûte presque rien.
+"""
+
+import re
+
+# Stopwords rajoutés à la liste de spacy
+STOPWORDS_SUPPLEMENTAIRES = {"avoir", "falloir", "faire", "monsieur", "direct",
+                             "interview", "livetweet", "suivez", r"invité\w+", r"(chaîne )?youtube", "mlp"}
+
+# Expressions régulières pour nettoyer le texte
+regexp_link = re.compile(r"http\S+") # suppression des liens
+regexp_number = re.compile(r"\d+[h., ]?\d*") # suppression des chiffres
+regexp_hashtags = re.compile(r"[@#]\S+\s+")   # suppression des hashtags et @
+
+# Ressources nltk de word_tokenize : punkt_tab depuis nltk 3.8.2, punkt avant
+RESSOURCES_TOKENISATION = ("punkt_tab", "punkt")
+
+_nlp = None
+
+
+def charger_nlp():
+
+  ''' Charge (une seule fois) le modèle français de spacy avec les stopwords supplémentaires '''
+  global _nlp
+  if _nlp is None:
+    import fr_core_news_md
+    _nlp = fr_core_news_md.load()
+    _nlp.Defaults.stop_words |= STOPWORDS_SUPPLEMENTAIRES
+  return _nlp
+
+
+def clean_txt_spacy(doc):
+  txt = [token.text for token in doc if  (not token.is_stop) and
+                                         (not token.is_punct) and
+                                         (not token.is_space)]
+  result = " ".join(txt)
+  return result
+
+
+def clean_lemmatize(doc):
+  lemmatized_txt = [token.lemma_ for token in doc if  (not token.is_stop) and
+                                                      (not token.is_punct) and
+                                                      (not token.is_space)]
+  lemmatized_txt = " ".join(lemmatized_txt)
+  return lemmatized_txt
+
+
+def clean_regexp(text):
+
+  '''Met le texte en minuscule et supprime les liens, hashtags et chiffres (sans spacy)'''
+  text_clean = text.lower().encode('utf-8').decode('utf-8')
+
+  # Suppression des liens, hashtags et chiffres avec les regexp précédentes
+  text_clean = re.sub(regexp_link, "", text_clean)
+  text_clean = re.sub(regexp_hashtags, "", text_clean)
+  text_clean = re.sub(regexp_number, "", text_clean)
+  return text_clean
+
+
+def preprocess_tweet(text, lemmatizing = True):
+
+  '''Fonction permettant de nettoyer le texte. Elle renvoie un string (pas de tokenisation encore)'''
+  text_clean = clean_regexp(text)
+
+  doc = charger_nlp()(text_clean)
+  if lemmatizing :
+    preprocessed_tweet = clean_lemmatize(doc)
+  else :
+    preprocessed_tweet = clean_txt_spacy(doc)
+
+  return preprocessed_tweet
+
+
+def preprocess_tweets(texts, lemmatizing = True, batch_size = 256):
+
+  '''Même résultat que preprocess_tweet appliqué à chaque tweet, mais spacy traite
+  les tweets par lots (nlp.pipe), ce qui est nettement plus rapide. Renvoie une liste'''
+  clean = clean_lemmatize if lemmatizing else clean_txt_spacy
+  textes_nettoyes = (clean_regexp(text) for text in texts)
+  return [clean(doc) for doc in charger_nlp().pipe(textes_nettoyes, batch_size=batch_size)]
+
+
+def tokenisation(tweet):
+  import nltk
+  tweet_tokenized = nltk.word_tokenize(tweet)
+  return(tweet_tokenized)
+
+
+def preparer_tokenisation():
+
+  ''' Télécharge si besoin les ressources nltk de la tokenisation et vérifie que word_tokenize
+  fonctionne. Lève RuntimeError sinon : à appeler avant le preprocessing spacy, pour ne pas
+  échouer seulement à la tokenisation, une fois le long passage spacy terminé '''
+  import nltk
+  try:
+    nltk.word_tokenize("test")
+    return
+  except LookupError:
+    pass
+
+  echecs = [nom for nom in RESSOURCES_TOKENISATION if not nltk.download(nom, quiet=True)]
+  try:
+    nltk.word_tokenize("test")
+  except LookupError as erreur:
+    raise RuntimeError("Ressources nltk de tokenisation introuvables (échec du téléchargement de {}) : "
+                       "les installer avec `python -m nltk.downloader {}`".format(
+                           ", ".join(echecs) or "aucune", " ".join(RESSOURCES_TOKENISATION))) from erreur
+
+
+def most_common_words(list_words, n):
+
+  ''' Renvoie les n mots les plus fréquents d'une liste de mots avec leur nombre d'occurrences '''
+  import nltk
+  return nltk.FreqDist(list_words).most_common(n)
+
+
+def get_n_most_common_words(list_words, n) :
+
+  ''' Fonction permettant de donner les n mots les plus fréquents d'une liste de mots '''
+  print(most_common_words(list_words, n))
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Générateur de tweets politiques français synthétiques.
+
+Produit un DataFrame avec la même structure que tweets_politics_2022.csv (user_id,
+created_at, text, favorite_count, retweet_count) pour tester et mesurer le pipeline
+sans le jeu de données réel. Les tweets mélangent des mots courants (dont des stopwords
+et de la ponctuation), un vocabulaire propre à chaque candidat (pour que le modèle ait
+quelque chose à apprendre), des hashtags, des mentions, des liens, des emojis et des chiffres.
+
+La génération est reproductible (graine) et vectorisée : 1M de tweets en une dizaine de secondes.
+
+Utilisation en ligne de commande :
+    python -m tweets_politiques.synthetique 100000 tweets_synthetiques.csv
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Candidats et part de chacun dans le jeu de données
+CANDIDATS = {"JeanLuc_Melenchon": 0.22,
+             "Eric_Zemmour": 0.18,
+             "Marine_Lepen": 0.18,
+             "Emmanuel_Macron": 0.07,
+             "Valerie_Pecresse": 0.12,
+             "Yannick_Jadot": 0.10,
+             "Anne_Hidalgo": 0.08,
+             "Fabien_Roussel": 0.05}
+
+MOTS_COURANTS = ("le la les un une des de du et à au aux en dans pour par sur avec sans ne pas plus "
+                 "nous vous ils elle il je on qui que quoi ce cette ces son sa ses notre nos votre vos "
+                 "est sont a ont être avoir faire falloir doit peut veut va allons faut "
+                 "tous toutes tout aujourd'hui demain ce soir hier jamais toujours enfin "
+                 "France français française Français pays peuple République politique président "
+                 "gouvernement campagne élection présidentielle candidat programme projet vote "
+                 "merci bravo soutien ensemble direct interview meeting invité suivez "
+                 ", , , . . . ! ! ? : … - « » \n\n").split(" ")
+
+THEMES = {"JeanLuc_Melenchon": "retraite retraites programme populaire commun humain union avenir "
+                               "écologie planification partage salaire smic insoumis insoumise bifurcation "
+                               "mer eau climat inégalités riches",
+          "Eric_Zemmour": "immigration civilisation identité enfant enfants étranger étrangers rural "
+                          "reconquête sécurité islam islamisme assimilation frontières grand remplacement "
+                          "déclassement histoire nation",
+          "Marine_Lepen": "pouvoir d'achat français patriote sécurité frontières priorité nationale "
+                          "référendum souveraineté énergie carburant taxes familles bureaucratie "
+                          "peuple liberté rassemblement",
+          "Emmanuel_Macron": "Europe européen européenne relance innovation jeunesse vaccin vaccination "
+                             "plan emploi travail entreprises investissement transition solidarité "
+                             "ukraine ambition responsabilité",
+          "Valerie_Pecresse": "ordre autorité dette région île-de-france réformes libertés famille "
+                              "karcher fierté courage travail mérite efficacité salaires économie",
+          "Yannick_Jadot": "climat écologie biodiversité transition agriculture pesticides énergie "
+                           "renouvelables vert verts justice sociale nucléaire vélo pollution forêts",
+          "Anne_Hidalgo": "Paris école enseignants salaires égalité logement femmes culture sociale "
+                          "socialiste république laïcité service public hôpital",
+          "Fabien_Roussel": "communiste travailleurs ouvriers usine salaire pension nationalisation "
+                            "industrie bonne viande fromage vin jours heureux"}
+
+HASHTAGS = {"JeanLuc_Melenchon": ["#Melenchon2022", "#UnionPopulaire", "#AvenirEnCommun", "#JLMBFMTV"],
+            "Eric_Zemmour": ["#Zemmour2022", "#Reconquete", "#ZemmourPresident", "#ImpossibleNestPasFrancais"],
+            "Marine_Lepen": ["#MLP2022", "#MarinePrésidente", "#RN", "#MLPTF1"],
+            "Emmanuel_Macron": ["#Macron2022", "#AvecVous", "#PFUE2022", "#LaFranceDesSolutions"],
+            "Valerie_Pecresse": ["#Pecresse2022", "#LesRépublicains", "#ValerieF2"],
+            "Yannick_Jadot": ["#Jadot2022", "#PoleEcologiste", "#ClimatEnsemble"],
+            "Anne_Hidalgo": ["#Hidalgo2022", "#ReinventonsLaFrance", "#PS"],
+            "Fabien_Roussel": ["#Roussel2022", "#LesJoursHeureux", "#PCF"]}
+
+HASHTAGS_COMMUNS = ["#Presidentielle2022", "#DirectAN", "#QAG", "#France2", "#BFMTV", "#LCI", "#Ukraine"]
+MENTIONS = ["@BFMTV", "@franceinter", "@LCI", "@TF1", "@France2tv", "@RTLFrance", "@Europe1",
+            "@CNEWS", "@franceinfo", "@LeMonde", "@le_Parisien", "@Mediapart", "@sudradio"]
+EMOJIS = ["😄", "👉", "🇫🇷", "🔴", "📺", "➡️", "💪", "🙏", "👏", "✊", "🌍", "🔥", "⚠️", "📍", "✅"]
+
+# Répartition des types de tokens : mot courant, mot du candidat, hashtag, mention, chiffre, emoji, lien
+PROBAS_TYPES = [0.62, 0.2, 0.05, 0.04, 0.05, 0.025, 0.015]
+
+DATE_DEBUT = "2021-01-01"
+DATE_FIN = "2022-04-10"
+
+
+def _vocabulaire_par_candidat(dictionnaire, candidats):
+
+  ''' Tableau (candidat, mot) : les listes sont complétées en boucle pour avoir la même taille '''
+  listes = [dictionnaire[candidat].split(" ") if isinstance(dictionnaire[candidat], str)
+            else list(dictionnaire[candidat]) for candidat in candidats]
+  taille = max(len(liste) for liste in listes)
+  return np.array([[liste[i % len(liste)] for i in range(taille)] for liste in listes], dtype=object)
+
+
+def _chiffres(rng, n):
+
+  ''' Chiffres au format des tweets : heures, pourcentages, montants, années '''
+  valeurs = rng.integers(1, 100, size=n)
+  formats = rng.integers(0, 5, size=n)
+  modeles = ["{}h", "{}%", "{},5", "{} 000", "20{}"]
+  return np.array([modeles[f].format(v) for f, v in zip(formats, valeurs)], dtype=object)
+
+
+def _liens(rng, n):
+
+  ''' Liens raccourcis t.co avec un identifiant aléatoire de 10 caractères '''
+  alphabet = np.array(list("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"))
+  ids = alphabet[rng.integers(0, len(alphabet), size=(n, 10))]
+  return np.array(["https://t.co/" + "".join(i) for i in ids], dtype=object)
+
+
+def generer_tweets(n, seed = 0, longueur_min = 6, longueur_max = 45):
+
+  ''' Génère n tweets synthétiques, renvoie un DataFrame de même structure que le jeu réel '''
+  rng = np.random.default_rng(seed)
+  candidats = list(CANDIDATS)
+  poids = np.array(list(CANDIDATS.values()))
+
+  users = rng.choice(len(candidats), size=n, p=poids / poids.sum())
+  longueurs = rng.integers(longueur_min, longueur_max + 1, size=n)
+  users_par_token = np.repeat(users, longueurs)
+  nb_tokens = len(users_par_token)
+  types = rng.choice(len(PROBAS_TYPES), size=nb_tokens, p=PROBAS_TYPES)
+
+  # Mots courants, tirés selon une loi de Zipf pour avoir des fréquences réalistes
+  mots_courants = np.array(MOTS_COURANTS, dtype=object)
+  rangs = (rng.zipf(1.3, size=nb_tokens) - 1) % len(mots_courants)
+  tokens = mots_courants[rangs]
+
+  themes = _vocabulaire_par_candidat(THEMES, candidats)
+  hashtags = _vocabulaire_par_candidat(HASHTAGS, candidats)
+
+  masque = types == 1
+  tokens[masque] = themes[users_par_token[masque], rng.integers(0, themes.shape[1], size=masque.sum())]
+  masque = types == 2
+  hashtags_candidat = hashtags[users_par_token[masque], rng.integers(0, hashtags.shape[1], size=masque.sum())]
+  hashtags_communs = np.array(HASHTAGS_COMMUNS, dtype=object)[rng.integers(0, len(HASHTAGS_COMMUNS), size=masque.sum())]
+  tokens[masque] = np.where(rng.random(masque.sum()) < 0.7, hashtags_candidat, hashtags_communs)
+  masque = types == 3
+  tokens[masque] = np.array(MENTIONS, dtype=object)[rng.integers(0, len(MENTIONS), size=masque.sum())]
+  masque = types == 4
+  tokens[masque] = _chiffres(rng, masque.sum())
+  masque = types == 5
+  tokens[masque] = np.array(EMOJIS, dtype=object)[rng.integers(0, len(EMOJIS), size=masque.sum())]
+  masque = types == 6
+  tokens[masque] = _liens(rng, masque.sum())
+
+  tokens = tokens.tolist()
+  fins = np.cumsum(longueurs).tolist()
+  debuts = [0] + fins[:-1]
+  textes = [" ".join(tokens[debut:fin]) for debut, fin in zip(debuts, fins)]
+
+  # dates sans fuseau : le notebook compare created_at à DATE_MIN, un datetime sans fuseau
+  debut = pd.Timestamp(DATE_DEBUT).value
+  fin = pd.Timestamp(DATE_FIN).value
+  dates = pd.to_datetime(np.sort(rng.integers(debut, fin, size=n))).floor("s")
+
+  # Popularité : loi log-normale dont la médiane dépend du candidat
+  popularite = np.exp(rng.normal(0, 1, size=len(candidats)) + 6)
+  favoris = rng.lognormal(np.log(popularite[users]), 1.2).astype(np.int64)
+  retweets = (favoris * rng.uniform(0.1, 0.4, size=n)).astype(np.int64)
+
+  return pd.DataFrame({"user_id": np.array(candidats, dtype=object)[users],
+                       "created_at": dates,
+                       "text": textes,
+                       "favorite_count": favoris,
+                       "retweet_count": retweets})
+
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Génère un fichier csv de tweets synthétiques")
+  parser.add_argument("n", type=int, help="nombre de tweets")
+  parser.add_argument("sortie", help="fichier csv à écrire")
+  parser.add_argument("--seed", type=int, default=0)
+  args = parser.parse_args()
+  generer_tweets(args.n, seed=args.seed).to_csv(args.sortie, index=False, encoding="utf-8")
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Graphiques : favoris / retweets dans le temps, nuages de mots et scattertext.
+
+matplotlib, wordcloud et scattertext ne sont importés qu'à l'appel des fonctions.
+Si `fichier` est donné, l'image est enregistrée au lieu d'être affichée.
+"""
+
+
+def _afficher_ou_enregistrer(fig, fichier):
+  import matplotlib.pyplot as plt
+
+  if fichier is None:
+    plt.show()
+  else:
+    fig.savefig(fichier, bbox_inches="tight")
+    plt.close(fig)
+
+
+def visualize_count_favorites(df, userID, fichier = None) :
+
+  ''' Cette fonction permet de visualiser le nombre de favoris et de retweets
+  sur toute la période pour un user_id donné '''
+  import matplotlib.pyplot as plt
+
+  df_temp = df.loc[df["user_id"] == userID]
+  ylabels = ["favorite_count", "retweet_count"]
+
+  print("Représentation des nombres de retweets et de favoris de chaque tweet de {} par date".format(userID))
+  fig = plt.figure(figsize=(13,3))
+  fig.subplots_adjust(hspace=0.01,wspace=0.01)
+
+  n_row = len(ylabels)
+  n_col = 1
+  for count, ylabel in enumerate(ylabels):
+      ax = fig.add_subplot(n_row, n_col, count + 1)
+      ax.plot(df_temp["created_at"], df_temp[ylabel])
+      ax.set_ylabel(ylabel)
+
+  _afficher_ou_enregistrer(fig, fichier)
+
+
+def create_wordcloud(text, nb_words, fichier = None):
+  import matplotlib.pyplot as plt
+  from wordcloud import WordCloud
+
+  wordcloud = WordCloud(max_words=nb_words, background_color="white").generate(text)
+  fig = plt.figure()
+  plt.imshow(wordcloud, interpolation="bilinear")
+  plt.axis("off")
+  _afficher_ou_enregistrer(fig, fichier)
+
+
+def create_scattertext(df, category, not_category, fichier, nb_termes = 4000, minimum_term_frequency = 10):
+
+  ''' Compare le vocabulaire (text_preprocess) de deux candidats et écrit le html du scattertext '''
+  import scattertext as st
+  from tweets_politiques.preprocessing import charger_nlp
+
+  df_sample = df.loc[df.user_id.isin([category, not_category])]
+
+  # on crée un objet corpus pour scattertext
+  corpus = st.CorpusFromPandas(data_frame = df_sample,
+                               category_col = "user_id",
+                               text_col = "text_preprocess",
+                               nlp = charger_nlp()).build().compact(st.AssociationCompactor(nb_termes))
+
+  html = st.produce_scattertext_explorer(  corpus
+                                         , category                  = category
+                                         , category_name             = category.replace("_", " ")
+                                         , not_category_name         = not_category.replace("_", " ")
+                                         , minimum_term_frequency    = minimum_term_frequency
+                                         , pmi_threshold_coefficient = 1
+                                         , term_ranker               = st.AbsoluteFrequencyRanker
+                                         , transform                 = st.Scalers.dense_rank
+                                         , term_scorer               = st.RankDifference()
+                                         , width_in_pixels           = 1000
+                                         )
+  with open(fichier, 'wb') as sortie:
+    sortie.write(html.encode('utf-8'))